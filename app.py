@@ -1,57 +1,55 @@
+import json
 import os
-from flask import Flask, request, jsonify
-import joblib
-import pickle
-import pandas as pd
-import numpy as np
-from datetime import datetime
+import time
+from flask import Flask, Response, g, request, jsonify, stream_with_context
+import metrics
+import profiling
+import service
 
 app = Flask(__name__)
 
-print("="*60)
-print("GOLD PRICE PREDICTOR - MACHINE LEARNING POWERED")
-print("="*60)
+# Bytes read from the request per step of /predict/stream
+STREAM_READ_BYTES = 64 * 1024
 
-# Load model - try different methods
-model = None
-scaler = None
 
-# Try to load existing model
-try:
-    model = joblib.load('gold_price_model.pkl')
-    print("✅ Model loaded successfully")
-except:
-    try:
-        with open('gold_price_model.pkl', 'rb') as f:
-            model = pickle.load(f)
-        print("✅ Model loaded with pickle")
-    except:
-        print("⚠️ Creating dummy model for testing")
-        # Create dummy model
-        from sklearn.linear_model import LinearRegression
-        model = LinearRegression()
-        model.coef_ = np.array([-15.5, 25.3, 8.7, -12.4])
-        model.intercept_ = 1800.0
+def create_app():
+    # Loads and warms the model (once per process, or on a background thread
+    # with STARTUP_MODE=background; see service.init)
+    service.init()
+    service.install_reload_signal()
+    return app
+
+
+@app.before_request
+def ensure_loaded():
+    # Keeps `gunicorn app:app` and the test client working without the factory
+    if service.state is None:
+        create_app()
 
-# Try to load scaler
-try:
-    scaler = joblib.load('scaler.pkl')
-    print("✅ Scaler loaded successfully")
-except:
-    try:
-        with open('scaler.pkl', 'rb') as f:
-            scaler = pickle.load(f)
-        print("✅ Scaler loaded with pickle")
-    except:
-        print("⚠️ Creating dummy scaler")
-        # Create dummy scaler
-        from sklearn.preprocessing import StandardScaler
-        scaler = StandardScaler()
-        scaler.mean_ = np.array([95, 3.0, 80, 2.5])
-        scaler.scale_ = np.array([5, 2, 20, 1.5])
 
-print(f"\n✅ Status: Model = {'Loaded' if model else 'Not loaded'}, Scaler = {'Loaded' if scaler else 'Not loaded'}")
-print("="*60)
+@app.before_request
+def start_instrumentation():
+    g.started = time.perf_counter()
+    # Opt-in per-stage timing and sampled profiling of the predict views
+    if request.path.startswith('/predict'):
+        profiling.settings.refresh()
+        g.timings = profiling.begin()
+        g.profiler = profiling.start_profiler()
+
+
+@app.after_request
+def finish_instrumentation(response):
+    timings = g.pop('timings', None)
+    if timings is not None:
+        profiling.mark('serialize')
+        response.headers['Server-Timing'] = profiling.end(timings)
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiling.stop_profiler(profiler, request.path)
+    started = g.pop('started', None)
+    if started is not None:
+        metrics.observe_request(request.path, response.status_code, time.perf_counter() - started)
+    return response
 
 @app.route('/')
 def home():
@@ -538,47 +536,87 @@ def home():
 
 @app.route('/predict', methods=['POST'])
 def predict():
-    if model is None:
-        return jsonify({'error': 'Model not loaded. Please check server logs.'}), 500
-    
     try:
         # Get data from request
         data = request.get_json()
-        
-        # Extract features
-        usd_index = float(data.get('usd_index', 95.5))
-        inflation = float(data.get('inflation', 3.2))
-        oil_price = float(data.get('oil_price', 78.3))
-        interest_rate = float(data.get('interest_rate', 2.75))
-        
-        # Create input array
-        input_array = np.array([[usd_index, inflation, oil_price, interest_rate]])
-        
-        # Scale features
-        scaled_input = scaler.transform(input_array)
-        
-        # Make prediction
-        prediction = model.predict(scaled_input)
-        
-        return jsonify({
-            'prediction': float(prediction[0]),
-            'features': data
-        })
-        
     except Exception as e:
         return jsonify({'error': str(e)}), 400
+    profiling.mark('parse')
+    body, status = service.predict_one(data, request.args.get('model'))
+    return jsonify(body), status
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    try:
+        data = request.get_json()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+    profiling.mark('parse')
+    body, status = service.predict_many(data, request.args.get('model'))
+    return jsonify(body), status
 
 @app.route('/health')
 def health():
-    return jsonify({
-        'status': 'ok',
-        'model_loaded': model is not None,
-        'scaler_loaded': scaler is not None,
-        'timestamp': datetime.now().isoformat()
-    })
+    return jsonify(service.health())
+
+@app.route('/predict/stream', methods=['POST'])
+def predict_stream():
+    scorer, error = service.stream_scorer(request.content_type, request.args.get('model'))
+    if error is not None:
+        body, status = error
+        return jsonify(body), status
+    # Read the first piece now so a sniffed CSV body gets a CSV response
+    stream = request.stream
+    try:
+        first = scorer.feed(stream.read(STREAM_READ_BYTES))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    def generate():
+        yield first
+        try:
+            while True:
+                data = stream.read(STREAM_READ_BYTES)
+                if not data:
+                    break
+                out = scorer.feed(data)
+                if out:
+                    yield out
+            yield scorer.close()
+        except ValueError as e:
+            # Headers are gone; report in-band and stop
+            yield (json.dumps({'error': str(e)}) + '\n').encode()
+
+    return Response(stream_with_context(generate()), mimetype=scorer.content_type)
+
+@app.route('/models')
+def models():
+    return jsonify(service.models())
+
+@app.route('/health/live')
+def health_live():
+    return jsonify(service.liveness())
+
+@app.route('/health/ready')
+def health_ready():
+    body, status = service.readiness()
+    return jsonify(body), status
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    token = request.headers.get('X-Admin-Token') or request.headers.get('Authorization', '').replace('Bearer ', '', 1)
+    # A body that is not JSON is refused rather than ignored (asgi.py does the same)
+    if request.get_data() and not request.is_json:
+        return jsonify({'error': 'Content-Type must be application/json'}), 415
+    body, status = service.admin_reload(token, request.get_json(silent=True))
+    return jsonify(body), status
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(service.metrics_text(), mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     print(f"\n🚀 Gold Price Predictor starting on http://localhost:{port}")
     print("="*60)
-    app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
+    create_app().run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
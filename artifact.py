@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+
+from compiled import SCORER_TYPES, load_fused
+from inference import FEATURES
+
+# On-disk predictor layout: a directory holding header.json plus one .npy file
+# per array. Raw .npy files (unlike .npz members) can be memory-mapped, so
+# gunicorn workers share one copy of the node arrays through the page cache.
+FORMAT_NAME = 'gold-price-predictor'
+FORMAT_VERSION = 1
+HEADER_FILE = 'header.json'
+
+
+def artifact_version(arrays):
+    # Content hash of the arrays; changes whenever the model changes
+    digest = hashlib.sha256()
+    for name in sorted(arrays):
+        digest.update(name.encode())
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    return digest.hexdigest()[:12]
+
+
+def save_artifact(scorer, path, source=None, metrics=None):
+    if scorer.kind not in SCORER_TYPES:
+        raise TypeError(f'cannot save a {scorer.kind} scorer as an artifact')
+    arrays = scorer.to_arrays()
+
+    header = {
+        'format': FORMAT_NAME,
+        'format_version': FORMAT_VERSION,
+        'kind': scorer.kind,
+        'version': artifact_version(arrays),
+        'features': FEATURES,
+        'created': datetime.now().isoformat(),
+        'source': source or {},
+        'metrics': metrics or {},
+        'arrays': {},
+    }
+
+    # Write next to the target and swap directories, so a reader never sees
+    # a half-written artifact
+    tmp_path = path.rstrip('/') + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        np.save(os.path.join(tmp_path, name + '.npy'), array, allow_pickle=False)
+        header['arrays'][name] = {
+            'file': name + '.npy',
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+        }
+    with open(os.path.join(tmp_path, HEADER_FILE), 'w') as f:
+        json.dump(header, f, indent=2)
+
+    old_path = path.rstrip('/') + '.old'
+    if os.path.exists(path):
+        shutil.rmtree(old_path, ignore_errors=True)
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return header
+
+
+def read_header(path):
+    with open(os.path.join(path, HEADER_FILE)) as f:
+        header = json.load(f)
+    if header.get('format') != FORMAT_NAME:
+        raise ValueError(f'{path} is not a {FORMAT_NAME} artifact')
+    if header.get('format_version', 0) > FORMAT_VERSION:
+        raise ValueError(f"artifact format version {header['format_version']} is newer than supported ({FORMAT_VERSION})")
+    if header['kind'] not in SCORER_TYPES:
+        raise ValueError(f"unknown artifact kind: {header['kind']}")
+    if header['features'] != FEATURES:
+        raise ValueError(f"artifact features {header['features']} do not match {FEATURES}")
+    return header
+
+
+def load_artifact(path, mmap=True):
+    header = read_header(path)
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        array = np.load(os.path.join(path, spec['file']), mmap_mode='r' if mmap else None, allow_pickle=False)
+        if array.dtype.str != spec['dtype'] or list(array.shape) != spec['shape']:
+            raise ValueError(f"array '{name}' does not match the artifact header")
+        arrays[name] = array
+    scorer = SCORER_TYPES[header['kind']].from_arrays(arrays)
+    scorer.header = header
+    return scorer
+
+
+def load_predictor(path, mmap=True):
+    # Accepts the versioned directory format or a single-file fused .npz
+    if os.path.isdir(path):
+        return load_artifact(path, mmap=mmap)
+    return load_fused(path)
@@ -0,0 +1,269 @@
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import metrics
+import profiling
+import service
+
+# ASGI front end with the same routes as app.py (/, /predict, /predict/batch,
+# /models, /health, /health/live, /health/ready, /metrics and /admin/reload).
+# The event loop only moves bytes; parsing, scoring and JSON encoding run on a
+# bounded thread pool through the shared service module, so one process can
+# hold thousands of idle keep-alive connections.
+#
+#   uvicorn asgi:app --workers 2
+#   GUNICORN_APP='asgi:create_app()' GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py
+
+INFERENCE_THREADS = int(os.environ.get('ASGI_INFERENCE_THREADS', 4))
+# Requests allowed to wait for the pool at once; the rest get 503
+MAX_PENDING = int(os.environ.get('ASGI_MAX_PENDING', 1024))
+MAX_BODY_BYTES = int(os.environ.get('ASGI_MAX_BODY_BYTES', 64 * 1024 * 1024))
+
+# The messages app.py returns from request.get_json() (werkzeug's), so both
+# front ends answer a bad /predict body the same way
+UNSUPPORTED_MEDIA_TYPE = ("415 Unsupported Media Type: Did not attempt to load JSON data because the request "
+                          "Content-Type was not 'application/json'.")
+BAD_REQUEST = "400 Bad Request: The browser (or proxy) sent a request that this server could not understand."
+
+_executor = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix='inference')
+_pending = 0
+_home_page = None
+
+
+def create_app():
+    # Same factory contract as app.create_app()
+    service.init()
+    service.install_reload_signal()
+    return app
+
+
+def _home():
+    # Serve the exact page the Flask app renders
+    global _home_page
+    if _home_page is None:
+        from app import home
+        _home_page = home().encode()
+    return _home_page
+
+
+def _handle_json(handler, body, path, model=None):
+    # Runs on the inference thread, so the profiling context stays with it
+    profiling.settings.refresh()
+    timings = profiling.begin()
+    profiler = profiling.start_profiler()
+    try:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return json.dumps({'error': BAD_REQUEST}).encode(), 400, []
+        profiling.mark('parse')
+        result, status = handler(data, model)
+        encoded = json.dumps(result).encode()
+        headers = []
+        if timings is not None:
+            profiling.mark('serialize')
+            headers.append((b'server-timing', profiling.end(timings).encode()))
+            timings = None
+        return encoded, status, headers
+    finally:
+        if timings is not None:
+            profiling.end(timings)
+        if profiler is not None:
+            profiling.stop_profiler(profiler, path)
+
+
+def _is_json(content_type):
+    # Same test as Flask's request.is_json
+    mimetype = content_type.split(b';')[0].strip().lower()
+    return mimetype == b'application/json' or (mimetype.startswith(b'application/') and mimetype.endswith(b'+json'))
+
+
+def _handle_admin_reload(token, body):
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        data = None
+    result, status = service.admin_reload(token, data)
+    return json.dumps(result).encode(), status, []
+
+
+async def _send(send, status, body, content_type=b'application/json', headers=()):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type), (b'content-length', str(len(body)).encode()), *headers],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _read_body(receive):
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise ValueError('request body too large')
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def _offload(fn, *args):
+    # Bounded hand-off to the inference pool
+    global _pending
+    if _pending >= MAX_PENDING:
+        return json.dumps({'error': 'Server busy, try again'}).encode(), 503, []
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+    finally:
+        _pending -= 1
+
+
+async def _stream(scope, receive, send):
+    # /predict/stream: each received piece is parsed and scored on the pool
+    # before the next one is read, so a fast client is held back by
+    # scoring instead of filling memory
+    headers = dict(scope.get('headers', []))
+    model = parse_qs(scope.get('query_string', b'').decode()).get('model', [None])[0]
+    scorer, error = service.stream_scorer(headers.get(b'content-type', b'').decode(), model)
+    if error is not None:
+        body, status = error
+        await _send(send, status, json.dumps(body).encode())
+        return status
+
+    loop = asyncio.get_running_loop()
+    started = False
+    more = True
+    while more:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        more = message.get('more_body', False)
+        try:
+            out = await loop.run_in_executor(_executor, scorer.feed, message.get('body', b''))
+            if not more:
+                out += await loop.run_in_executor(_executor, scorer.close)
+        except ValueError as e:
+            if not started:
+                await _send(send, 400, json.dumps({'error': str(e)}).encode())
+                return 400
+            # Headers are gone; report in-band and stop
+            await send({'type': 'http.response.body', 'body': (json.dumps({'error': str(e)}) + '\n').encode()})
+            return 200
+        # Start the response once the format is known (sniffed from the first line)
+        if not started and (out or not more):
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [(b'content-type', scorer.content_type.encode())],
+            })
+            started = True
+        if out or not more:
+            await send({'type': 'http.response.body', 'body': out, 'more_body': more})
+    return 200
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                await asyncio.get_running_loop().run_in_executor(_executor, service.init)
+                service.install_reload_signal()
+            except Exception as e:
+                await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                return
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def _dispatch(scope, receive, send):
+    # Returns the response status (None if the client went away)
+    route = (scope['method'], scope['path'])
+    if route == ('GET', '/'):
+        status = 200
+        await _send(send, status, _home(), b'text/html; charset=utf-8')
+    elif route == ('GET', '/health'):
+        body, status, headers = await _offload(lambda: (json.dumps(service.health()).encode(), 200, []))
+        await _send(send, status, body, headers=headers)
+    elif route == ('POST', '/predict/stream'):
+        return await _stream(scope, receive, send)
+    elif route == ('GET', '/models'):
+        body, status, headers = await _offload(lambda: (json.dumps(service.models()).encode(), 200, []))
+        await _send(send, status, body, headers=headers)
+    elif route == ('GET', '/health/live'):
+        # Answered on the event loop: liveness must not queue behind inference
+        status = 200
+        await _send(send, status, json.dumps(service.liveness()).encode())
+    elif route == ('GET', '/health/ready'):
+        body, status = service.readiness()
+        await _send(send, status, json.dumps(body).encode())
+    elif route == ('POST', '/admin/reload'):
+        try:
+            body = await _read_body(receive)
+        except ValueError as e:
+            await _send(send, 413, json.dumps({'error': str(e)}).encode())
+            return 413
+        if body is None:
+            return None
+        headers = dict(scope.get('headers', []))
+        if body and not _is_json(headers.get(b'content-type', b'')):
+            await _send(send, 415, json.dumps({'error': 'Content-Type must be application/json'}).encode())
+            return 415
+        token = (headers.get(b'x-admin-token') or headers.get(b'authorization', b'').replace(b'Bearer ', b'', 1)).decode()
+        # Reloading runs on the pool, off the event loop
+        body, status, headers = await _offload(_handle_admin_reload, token, body)
+        await _send(send, status, body, headers=headers)
+    elif route == ('GET', '/metrics'):
+        body, status, headers = await _offload(lambda: (service.metrics_text().encode(), 200, []))
+        await _send(send, status, body, b'text/plain; version=0.0.4', headers)
+    elif route in (('POST', '/predict'), ('POST', '/predict/batch')):
+        try:
+            body = await _read_body(receive)
+        except ValueError as e:
+            await _send(send, 413, json.dumps({'error': str(e)}).encode())
+            return 413
+        if body is None:
+            return None
+        if not _is_json(dict(scope.get('headers', [])).get(b'content-type', b'')):
+            await _send(send, 400, json.dumps({'error': UNSUPPORTED_MEDIA_TYPE}).encode())
+            return 400
+        handler = service.predict_one if scope['path'] == '/predict' else service.predict_many
+        model = parse_qs(scope.get('query_string', b'').decode()).get('model', [None])[0]
+        body, status, headers = await _offload(_handle_json, handler, body, scope['path'], model)
+        await _send(send, status, body, headers=headers)
+    elif scope['path'] in ('/', '/health', '/health/live', '/health/ready', '/metrics', '/models',
+                           '/admin/reload', '/predict', '/predict/batch', '/predict/stream'):
+        status = 405
+        await _send(send, status, json.dumps({'error': 'Method not allowed'}).encode())
+    else:
+        status = 404
+        await _send(send, status, json.dumps({'error': 'Not found'}).encode())
+    return status
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    if service.state is None:
+        await asyncio.get_running_loop().run_in_executor(_executor, service.init)
+
+    started = time.perf_counter()
+    status = await _dispatch(scope, receive, send)
+    if status is not None:
+        metrics.observe_request(scope['path'], status, time.perf_counter() - started)
@@ -0,0 +1,134 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+# Histogram bucket upper bounds (the last bucket catches everything above)
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+QUEUE_DEPTH_BUCKETS = [0, 1, 2, 4, 8, 16, 32, 64, 128]
+WAIT_MS_BUCKETS = [0.5, 1, 2, 5, 10, 20, 50, 100, 250]
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+    def to_dict(self):
+        # Bucket list keeps its order through jsonify (dict keys get sorted)
+        labels = [str(b) for b in self.buckets] + ['+Inf']
+        return {
+            'buckets': [[label, count] for label, count in zip(labels, self.counts)],
+            'count': self.total,
+            'sum': round(self.sum, 3),
+        }
+
+
+class MicroBatcher:
+    # Coalesces concurrent predictions into one model call. Requests that
+    # arrive within window_ms of the first queued request (or until max_rows
+    # rows are waiting) are stacked and scored together.
+
+    def __init__(self, predict_fn, window_ms=2.0, max_rows=64):
+        self.predict_fn = predict_fn
+        self.window = window_ms / 1000.0
+        self.max_rows = max_rows
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+        self.batches = 0
+        self.rows = 0
+        self.max_queue_depth = 0
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_depths = Histogram(QUEUE_DEPTH_BUCKETS)
+        self.wait_ms = Histogram(WAIT_MS_BUCKETS)
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so start one per worker process
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def submit(self, X):
+        self._ensure_started()
+        future = Future()
+        self._queue.put((np.asarray(X, dtype=np.float64), future, time.perf_counter()))
+        return future
+
+    def predict(self, X, timeout=None):
+        return self.submit(X).result(timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.window
+        while rows < self.max_rows:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            depth = self._queue.qsize()
+            matrices = [item[0] for item in batch]
+            try:
+                predictions = self.predict_fn(np.vstack(matrices))
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            # Hand each caller back its own slice of the batch
+            now = time.perf_counter()
+            start = 0
+            for X, future, enqueued in batch:
+                future.set_result(predictions[start:start + len(X)])
+                start += len(X)
+                self.wait_ms.observe((now - enqueued) * 1000.0)
+
+            self.batches += 1
+            self.rows += start
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+            self.batch_sizes.observe(start)
+            self.queue_depths.observe(depth)
+
+    def stats(self):
+        return {
+            'window_ms': self.window * 1000.0,
+            'max_rows': self.max_rows,
+            'queue_depth': self._queue.qsize(),
+            'max_queue_depth': self.max_queue_depth,
+            'batches': self.batches,
+            'rows': self.rows,
+            'batch_size': self.batch_sizes.to_dict(),
+            'queue_depth_at_dispatch': self.queue_depths.to_dict(),
+            'wait_ms': self.wait_ms.to_dict(),
+        }
@@ -0,0 +1,227 @@
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+
+import numpy as np
+
+from inference import FEATURES, sample_inputs
+
+# Load test for the serving endpoints: replays recorded request files and/or
+# synthetic traffic against /predict, in-process (Flask test client) or over
+# HTTP (an existing server or a local gunicorn started for the run), and
+# reports throughput, latency percentiles and error rate per concurrency level.
+#
+#   python benchmark.py --synthetic 5000 --concurrency 1,4,16
+#   python benchmark.py --requests traffic.jsonl --gunicorn --output bench.json
+
+
+def load_requests(path):
+    # One JSON object per line: either {"path": ..., "body": ...} or a bare
+    # /predict body. Lines without any feature (e.g. the change-request backlog
+    # in requests.jsonl) are not traffic and are skipped.
+    requests, skipped = [], 0
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, dict) and 'path' in record and 'body' in record:
+                requests.append((record['path'], record['body']))
+            elif isinstance(record, dict) and any(name in record for name in FEATURES):
+                requests.append(('/predict', record))
+            else:
+                skipped += 1
+    return requests, skipped
+
+
+def synthetic_requests(n, ui_steps=False, seed=0):
+    # Uniform over the documented feature ranges; ui_steps rounds to the
+    # slider precision, which is what real UI traffic looks like
+    X = sample_inputs(n, seed=seed)
+    if ui_steps:
+        steps = np.array([10.0, 10.0, 10.0, 100.0])
+        X = np.round(X * steps) / steps
+    return [('/predict', dict(zip(FEATURES, row))) for row in X.tolist()]
+
+
+class InProcessClient:
+    def __init__(self):
+        from app import create_app
+        self.client = create_app().test_client()
+
+    def post(self, path, body):
+        response = self.client.post(path, json=body)
+        return response.status_code
+
+
+class HttpClient:
+    # One keep-alive connection per thread (reopened if the server closes it)
+    def __init__(self, url):
+        parsed = urlparse(url)
+        self.connection = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+        self.prefix = parsed.path.rstrip('/')
+
+    def post(self, path, body):
+        payload = json.dumps(body)
+        try:
+            self.connection.request('POST', self.prefix + path, payload, {'Content-Type': 'application/json'})
+            response = self.connection.getresponse()
+            response.read()
+            return response.status
+        except (http.client.HTTPException, OSError):
+            self.connection.close()
+            return 0
+
+
+def run_level(make_client, requests, concurrency):
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+
+    def worker(i):
+        client = make_client()
+        for path, body in requests[i::concurrency]:
+            started = time.perf_counter_ns()
+            status = client.post(path, body)
+            latencies[i].append(time.perf_counter_ns() - started)
+            if status != 200:
+                errors[i] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    ms = np.concatenate([np.array(lat, dtype=np.float64) for lat in latencies]) / 1e6
+    total = len(ms)
+    p50, p95, p99, p999 = np.percentile(ms, [50, 95, 99, 99.9]) if total else (0, 0, 0, 0)
+    return {
+        'concurrency': concurrency,
+        'requests': total,
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(total / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+        'p999_ms': round(float(p999), 3),
+        'error_rate': round(sum(errors) / total, 5) if total else 0.0,
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(workers):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers))
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        # /health answers as soon as a worker is up; /health/ready only once
+        # the model is loaded and warmed, which is what the run should measure
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            connection.request('GET', '/health/ready')
+            if connection.getresponse().status == 200:
+                return process, url
+        except OSError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn did not become ready within 60s')
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test /predict')
+    parser.add_argument('--requests', action='append', default=[], help='JSONL request file to replay (repeatable)')
+    parser.add_argument('--synthetic', type=int, default=0, help='number of synthetic requests to add')
+    parser.add_argument('--ui-steps', action='store_true', help='round synthetic inputs to the UI slider steps')
+    parser.add_argument('--concurrency', default='1,4,16', help='comma-separated concurrency levels')
+    parser.add_argument('--url', help='benchmark a running server at this URL')
+    parser.add_argument('--gunicorn', action='store_true', help='start a local gunicorn for the run')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers with --gunicorn')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    requests = []
+    for path in args.requests:
+        replayed, skipped = load_requests(path)
+        print(f"✅ {path}: {len(replayed)} requests" + (f" ({skipped} non-request lines skipped)" if skipped else ""))
+        requests += replayed
+    if args.synthetic or not requests:
+        requests += synthetic_requests(args.synthetic or 2000, args.ui_steps)
+    levels = [int(c) for c in args.concurrency.split(',')]
+
+    process = None
+    if args.gunicorn:
+        process, url = start_gunicorn(args.workers)
+        target = f'gunicorn ({args.workers} workers) at {url}'
+    else:
+        url = args.url
+        target = url or 'in-process Flask test client'
+    make_client = (lambda: HttpClient(url)) if url else InProcessClient
+    # Load the in-process app before anything is timed
+    make_client().post('/predict', {})
+
+    print("="*60)
+    print(f"Benchmarking {len(requests)} requests against {target}")
+    print("="*60)
+    print(f"{'Conc':<6} {'RPS':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'p99.9 ms':>9} {'Errors':>8}")
+    print("-"*60)
+    results = []
+    try:
+        for concurrency in levels:
+            result = run_level(make_client, requests, concurrency)
+            results.append(result)
+            print(f"{concurrency:<6} {result['throughput_rps']:>9.1f} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                  f"{result['p99_ms']:>9.2f} {result['p999_ms']:>9.2f} {result['error_rate']:>8.2%}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    print("="*60)
+
+    if args.output:
+        report = {
+            'timestamp': datetime.now().isoformat(),
+            'commit': git_commit(),
+            'target': 'gunicorn' if args.gunicorn else ('http' if url else 'inprocess'),
+            'workers': args.workers if args.gunicorn else None,
+            'request_files': args.requests,
+            'requests': len(requests),
+            'environment': {k: v for k, v in os.environ.items()
+                            if k.startswith(('INFERENCE_', 'MICROBATCH_', 'PREDICTION_', 'FUSED_', 'MAX_BATCH'))},
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+import hashlib
+import mmap
+import struct
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Decimal places of the UI inputs (step 0.1, 0.1, 0.1 and 0.01 in home())
+DECIMALS = (1, 1, 1, 2)
+SCALES = tuple(10 ** d for d in DECIMALS)
+
+
+def quantize(row):
+    # Integer key at UI precision. Rows that are not on that grid return None
+    # and bypass the cache, so a hit always returns the exact prediction.
+    key = tuple(int(round(float(x) * s)) for x, s in zip(row, SCALES))
+    for k, x, s in zip(key, row, SCALES):
+        if abs(k / s - float(x)) > 1e-9:
+            return None
+    return key
+
+
+class PredictionCache:
+    # In-process LRU keyed on the quantized feature tuple. Entries belong to a
+    # model version; the first lookup under a new version clears the cache.
+    backend = 'local'
+
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bypassed = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key, version):
+        if key is None:
+            self.bypassed += 1
+            return None
+        with self._lock:
+            self._check_version(version)
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, version):
+        if key is None:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        return {
+            'backend': self.backend,
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'bypassed': self.bypassed,
+            'invalidations': self.invalidations,
+        }
+
+
+# Shared table slot: 4 key ints, version, value bits, checksum
+_SLOT = struct.Struct('<7q')
+
+
+class SharedPredictionCache(PredictionCache):
+    # Direct-mapped table in an anonymous shared mapping. Created in the
+    # gunicorn master before fork, so every worker reads and writes the same
+    # pages. There are no locks: each slot carries a checksum of its contents
+    # and a torn or stale slot simply reads as a miss. A colliding insert
+    # overwrites the slot (counted as an eviction). Counters are per worker.
+    backend = 'shared'
+
+    def __init__(self, max_size=65536):
+        super().__init__(max_size)
+        self._buffer = mmap.mmap(-1, _SLOT.size * max_size)
+        self._version_ids = (None, 0)
+
+    def _version_id(self, version):
+        # Stable across processes (str hashes are randomized per process)
+        if self._version_ids[0] != version:
+            self._version_ids = (version, int(hashlib.sha256(str(version).encode()).hexdigest()[:15], 16))
+        return self._version_ids[1]
+
+    @staticmethod
+    def _checksum(fields):
+        return hash(fields) & 0x7FFFFFFFFFFFFFFF
+
+    def _slot(self, key):
+        return (hash(key) % self.max_size) * _SLOT.size
+
+    def get(self, key, version):
+        if key is None:
+            self.bypassed += 1
+            return None
+        offset = self._slot(key)
+        slot = _SLOT.unpack_from(self._buffer, offset)
+        fields = tuple(key) + (self._version_id(version),)
+        if slot[:5] != fields or slot[6] != self._checksum(fields + (slot[5],)):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return struct.unpack('<d', struct.pack('<q', slot[5]))[0]
+
+    def put(self, key, value, version):
+        if key is None:
+            return
+        offset = self._slot(key)
+        previous = _SLOT.unpack_from(self._buffer, offset)
+        if previous[6] and previous[:4] != tuple(key):
+            self.evictions += 1
+        bits = struct.unpack('<q', struct.pack('<d', float(value)))[0]
+        fields = tuple(key) + (self._version_id(version), bits)
+        _SLOT.pack_into(self._buffer, offset, *fields, self._checksum(fields))
+
+    def stats(self):
+        stats = super().stats()
+        slots = np.frombuffer(self._buffer, dtype=np.int64).reshape(-1, 7)
+        stats['size'] = int(np.count_nonzero(slots[:, 6]))
+        return stats
@@ -0,0 +1,226 @@
+import numpy as np
+
+from inference import FEATURES, SklearnScorer, sample_inputs
+
+# Largest rows x trees batch the forest scorer traverses all trees at once
+BROADCAST_LIMIT = 65536
+
+
+class LinearScorer:
+    # Scaler folded into the coefficients: one fused dot product per call
+    kind = 'compiled-linear'
+
+    def __init__(self, coef, intercept):
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64)
+        self.intercept = float(np.ravel(intercept)[0])
+
+    def predict(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+
+    def to_arrays(self):
+        return {'coef': self.coef, 'intercept': np.array(self.intercept)}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays['coef'], arrays['intercept'])
+
+
+class ForestScorer:
+    # Trees flattened into contiguous node arrays with the scaler folded into
+    # the split thresholds. Leaves point at themselves, so a row can take a
+    # fixed number of vectorized steps without checking for termination.
+    kind = 'compiled-forest'
+
+    def __init__(self, feature, threshold, left, right, value, roots, depths):
+        self.feature = np.ascontiguousarray(feature, dtype=np.intp)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.intp)
+        self.right = np.ascontiguousarray(right, dtype=np.intp)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.intp)
+        self.depths = np.ascontiguousarray(depths, dtype=np.intp)
+
+    def _predict_all_trees(self, X):
+        # Small batches: step every (row, tree) pair at once
+        flat = X.ravel()
+        base = (np.arange(len(X)) * X.shape[1])[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(int(self.depths.max())):
+            go_left = flat[base + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes].mean(axis=1)
+
+    def _predict_per_tree(self, X):
+        # Large batches: one tree at a time keeps the working set in cache
+        flat = X.ravel()
+        base = np.arange(len(X)) * X.shape[1]
+        total = np.zeros(len(X))
+        for root, depth in zip(self.roots.tolist(), self.depths.tolist()):
+            nodes = np.full(len(X), root, dtype=np.intp)
+            for _ in range(depth):
+                go_left = flat[base + self.feature[nodes]] <= self.threshold[nodes]
+                nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+            total += self.value[nodes]
+        return total / len(self.roots)
+
+    def predict(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if len(X) * len(self.roots) <= BROADCAST_LIMIT:
+            return self._predict_all_trees(X)
+        return self._predict_per_tree(X)
+
+    def to_arrays(self):
+        return {
+            'feature': self.feature, 'threshold': self.threshold,
+            'left': self.left, 'right': self.right, 'value': self.value,
+            'roots': self.roots, 'depths': self.depths,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(
+            arrays['feature'], arrays['threshold'], arrays['left'], arrays['right'],
+            arrays['value'], arrays['roots'], arrays['depths']
+        )
+
+
+def _scaler_params(scaler, n_features):
+    # StandardScaler-style mean_/scale_; None means that step is disabled
+    if not hasattr(scaler, 'mean_') and not hasattr(scaler, 'scale_'):
+        raise TypeError(f'unsupported scaler type: {type(scaler).__name__}')
+    mean = getattr(scaler, 'mean_', None)
+    scale = getattr(scaler, 'scale_', None)
+    mean = np.zeros(n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+    scale = np.ones(n_features) if scale is None else np.asarray(scale, dtype=np.float64)
+    return mean, scale
+
+
+def _ordered(x):
+    # Map float64 values onto int64 keys with the same ordering
+    i = x.view(np.int64)
+    return np.where(i >= 0, i, -(i & 0x7FFFFFFFFFFFFFFF))
+
+
+def _unordered(key):
+    sign = np.int64(-0x8000000000000000)
+    return np.where(key >= 0, key, (-key) | sign).view(np.float64)
+
+
+def _fold_thresholds(threshold, mean, scale):
+    # sklearn trees compare float32((x - mean) / scale) <= t. That predicate is
+    # monotone in x, so it holds exactly for x <= T for some float64 T. Start
+    # from the algebraic fold t * scale + mean and bisect on the float64 grid
+    # to find the exact T, so compiled splits agree with sklearn bit for bit.
+    def goes_left(x):
+        return ((x - mean) / scale).astype(np.float32) <= threshold
+
+    approx = threshold * scale + mean
+    delta = (np.abs(approx) + scale) * 1e-5
+    lo, hi = approx - delta, approx + delta
+    while not goes_left(lo).all() or goes_left(hi).any():
+        delta *= 16
+        lo = np.where(goes_left(lo), lo, approx - delta)
+        hi = np.where(goes_left(hi), approx + delta, hi)
+
+    lo_key, hi_key = _ordered(lo), _ordered(hi)
+    while (hi_key - lo_key > 1).any():
+        mid_key = lo_key + (hi_key - lo_key) // 2
+        left = goes_left(_unordered(mid_key))
+        lo_key = np.where(left, mid_key, lo_key)
+        hi_key = np.where(left, hi_key, mid_key)
+    return _unordered(lo_key)
+
+
+def compile_linear(model, scaler):
+    coef = np.asarray(model.coef_, dtype=np.float64).ravel()
+    mean, scale = _scaler_params(scaler, len(coef))
+    # model(scaled(x)) = ((x - mean) / scale) @ coef + b = x @ (coef / scale) + (b - mean @ (coef / scale))
+    folded = coef / scale
+    intercept = float(np.ravel(model.intercept_)[0]) - float(mean @ folded)
+    return LinearScorer(folded, intercept)
+
+
+def compile_forest(model, scaler):
+    trees = [model] if hasattr(model, 'tree_') else list(model.estimators_)
+    mean, scale = _scaler_params(scaler, model.n_features_in_)
+
+    feature, threshold, left, right, value, roots, depths = [], [], [], [], [], [], []
+    offset = 0
+    for estimator in trees:
+        tree = estimator.tree_
+        n = tree.node_count
+        is_leaf = tree.children_left < 0
+        ids = np.arange(offset, offset + n)
+
+        f = np.where(is_leaf, 0, tree.feature)
+        t = np.full(n, np.inf)
+        split = ~is_leaf
+        t[split] = _fold_thresholds(tree.threshold[split], mean[f[split]], scale[f[split]])
+        feature.append(f)
+        threshold.append(t)
+        left.append(np.where(is_leaf, ids, tree.children_left + offset))
+        right.append(np.where(is_leaf, ids, tree.children_right + offset))
+        value.append(tree.value[:, 0, 0])
+        roots.append(offset)
+        depths.append(tree.max_depth)
+        offset += n
+
+    return ForestScorer(
+        np.concatenate(feature), np.concatenate(threshold),
+        np.concatenate(left), np.concatenate(right),
+        np.concatenate(value), np.array(roots), np.array(depths)
+    )
+
+
+def _compiler_for(model):
+    name = type(model).__name__
+    if name in ('LinearRegression', 'Ridge', 'Lasso', 'ElasticNet'):
+        return compile_linear
+    if name in ('RandomForestRegressor', 'ExtraTreesRegressor', 'DecisionTreeRegressor', 'ExtraTreeRegressor'):
+        return compile_forest
+    return None
+
+
+def compile_scorer(model, scaler, check_rows=1000, rtol=1e-7, atol=1e-6):
+    # Returns a compiled scorer when the model type is supported and it agrees
+    # with model.predict(scaler.transform(X)); otherwise the sklearn scorer.
+    fallback = SklearnScorer(model, scaler)
+    compiler = _compiler_for(model)
+    if compiler is None:
+        print(f"⚠️ No compiled scorer for {type(model).__name__}, using sklearn")
+        return fallback
+
+    try:
+        scorer = compiler(model, scaler)
+        if check_rows:
+            X = sample_inputs(check_rows)
+            expected = fallback.predict(X)
+            if not np.allclose(scorer.predict(X), expected, rtol=rtol, atol=atol):
+                raise ValueError('compiled predictions differ from sklearn')
+    except Exception as e:
+        print(f"⚠️ Compiled scorer unavailable ({e}), using sklearn")
+        return fallback
+
+    return scorer
+
+
+SCORER_TYPES = {cls.kind: cls for cls in (LinearScorer, ForestScorer)}
+
+
+def save_fused(scorer, path):
+    # Single-file predictor: the folded model arrays plus their kind and feature
+    # order. Plain arrays only, so loading needs neither pickle nor sklearn.
+    if scorer.kind not in SCORER_TYPES:
+        raise TypeError(f'cannot save a {scorer.kind} scorer as a fused artifact')
+    with open(path, 'wb') as f:
+        np.savez(f, kind=np.array(scorer.kind), features=np.array(FEATURES), **scorer.to_arrays())
+
+
+def load_fused(path):
+    with np.load(path, allow_pickle=False) as arrays:
+        kind = str(arrays['kind'])
+        if kind not in SCORER_TYPES:
+            raise ValueError(f'unknown fused model kind: {kind}')
+        if list(arrays['features']) != FEATURES:
+            raise ValueError(f"fused model features {list(arrays['features'])} do not match {FEATURES}")
+        return SCORER_TYPES[kind].from_arrays({name: arrays[name] for name in arrays.files})
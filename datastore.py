@@ -0,0 +1,251 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from cleaning import DATE_COLUMN
+
+# Typed, date-partitioned Parquet storage for the datasets (needs pyarrow):
+#
+#   data/gold_price_clean/year=2020/part-0.parquet
+#   data/gold_price_clean/year=2021/part-0.parquet
+#   ...
+#
+# Floats are stored as binary float64, so values come back bit for bit. The
+# CSVs are only exact if they are read with float_precision='round_trip'
+# (pandas' default parser can be off by an ulp), which the converter does.
+# Rows are sorted by date within each file and written in row groups of
+# ROW_GROUP_ROWS, so a date range skips whole years through the partition
+# directories and whole row groups through their min/max statistics, and
+# only the requested columns are decoded.
+#
+#   python datastore.py convert gold_price_data.csv gold_price_clean.csv
+#   python datastore.py bench data/gold_price_clean --csv gold_price_clean.csv
+
+DATA_DIR = 'data'
+PARTITION = 'year'
+ROW_GROUP_ROWS = 64 * 1024
+
+
+def require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.dataset  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        print("❌ Parquet storage needs pyarrow (pip install pyarrow)")
+        sys.exit(1)
+    return pyarrow
+
+
+def dataset_path(csv_path, data_dir=DATA_DIR):
+    return os.path.join(data_dir, os.path.splitext(os.path.basename(csv_path))[0])
+
+
+def read_csv_exact(path, **kwargs):
+    # The parsed floats equal the ones that were written
+    df = pd.read_csv(path, float_precision='round_trip', **kwargs)
+    if DATE_COLUMN in df:
+        df[DATE_COLUMN] = pd.to_datetime(df[DATE_COLUMN])
+    return df
+
+
+def _schema(df):
+    pa = require_pyarrow()
+    fields = []
+    for name, dtype in df.dtypes.items():
+        if name == DATE_COLUMN:
+            fields.append(pa.field(name, pa.date32()))
+        elif pd.api.types.is_numeric_dtype(dtype):
+            fields.append(pa.field(name, pa.float64()))
+        else:
+            fields.append(pa.field(name, pa.string()))
+    return pa.schema(fields)
+
+
+def write_dataset(df, root, row_group_rows=ROW_GROUP_ROWS):
+    # Replaces root with one directory per year. Written to a temporary
+    # directory first, so readers never see a half-written dataset.
+    pa = require_pyarrow()
+    import pyarrow.parquet as pq
+    if DATE_COLUMN not in df:
+        raise ValueError(f"partitioning needs a '{DATE_COLUMN}' column")
+    schema = _schema(df)
+    df = df.sort_values(DATE_COLUMN, kind='stable')
+    years = pd.DatetimeIndex(df[DATE_COLUMN]).year
+    parent = os.path.dirname(os.path.abspath(root))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=parent, prefix='.staging-')
+    old = root.rstrip('/') + '.old'
+    try:
+        for year in np.unique(years):
+            part = df[years == year]
+            directory = os.path.join(staging, f'{PARTITION}={year}')
+            os.makedirs(directory)
+            table = pa.Table.from_pandas(part, schema=schema, preserve_index=False)
+            pq.write_table(table, os.path.join(directory, 'part-0.parquet'),
+                           row_group_size=row_group_rows, compression='zstd')
+        # Rename the old copy aside instead of deleting it first, so root is
+        # only missing between two renames and never half-deleted
+        if os.path.exists(root):
+            shutil.rmtree(old, ignore_errors=True)
+            os.replace(root, old)
+        os.replace(staging, root)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        if not os.path.exists(root) and os.path.exists(old):
+            os.replace(old, root)
+        raise
+    shutil.rmtree(old, ignore_errors=True)
+    return root
+
+
+def read_dataset(root, columns=None, start=None, end=None):
+    # DataFrame of the rows with start <= date < end (either may be None),
+    # decoding only `columns`. The date comes back as datetime64, as after
+    # cleaning.parse_dates.
+    require_pyarrow()
+    import pyarrow.dataset as ds
+    dataset = ds.dataset(root, format='parquet', partitioning='hive')
+    condition = None
+    for bound, compare in ((start, 'ge'), (end, 'lt')):
+        if bound is None:
+            continue
+        bound = pd.Timestamp(bound)
+        # The partition test prunes directories, the date test row groups
+        year = ds.field(PARTITION) >= bound.year if compare == 'ge' else ds.field(PARTITION) <= bound.year
+        date = ds.field(DATE_COLUMN) >= bound.date() if compare == 'ge' else ds.field(DATE_COLUMN) < bound.date()
+        condition = year & date if condition is None else condition & year & date
+    if columns is None:
+        columns = [name for name in dataset.schema.names if name != PARTITION]
+    table = dataset.to_table(columns=list(columns), filter=condition)
+    df = table.to_pandas(date_as_object=False)
+    if DATE_COLUMN in df:
+        df[DATE_COLUMN] = df[DATE_COLUMN].astype('datetime64[ns]')
+    return df
+
+
+def load_frame(path, columns=None, start=None, end=None):
+    # One entry point for training and backtests: a dataset directory or a CSV
+    if os.path.isdir(path):
+        return read_dataset(path, columns, start, end)
+    ranged = start is not None or end is not None
+    usecols = list(columns) + [DATE_COLUMN] if columns and ranged and DATE_COLUMN not in columns else columns
+    df = read_csv_exact(path, usecols=usecols)
+    if ranged:
+        dates = df[DATE_COLUMN]
+        mask = np.ones(len(df), dtype=bool)
+        if start is not None:
+            mask &= (dates >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (dates < pd.Timestamp(end)).to_numpy()
+        df = df[mask].reset_index(drop=True)
+    return df[list(columns)] if columns else df
+
+
+def iter_frames(path, columns=None, chunk_rows=ROW_GROUP_ROWS):
+    # load_frame in chunks of about chunk_rows, for data larger than memory
+    if os.path.isdir(path):
+        require_pyarrow()
+        import pyarrow.dataset as ds
+        dataset = ds.dataset(path, format='parquet', partitioning='hive')
+        # Year directories in order, so a date-sorted dataset streams in date order
+        fragments = sorted(dataset.get_fragments(), key=lambda fragment: fragment.path)
+        columns = list(columns) if columns else [name for name in dataset.schema.names if name != PARTITION]
+        for fragment in fragments:
+            for batch in fragment.to_batches(columns=columns, batch_size=chunk_rows):
+                df = batch.to_pandas(date_as_object=False)
+                if DATE_COLUMN in df:
+                    df[DATE_COLUMN] = df[DATE_COLUMN].astype('datetime64[ns]')
+                yield df
+        return
+    for df in pd.read_csv(path, usecols=columns, chunksize=chunk_rows, float_precision='round_trip'):
+        if DATE_COLUMN in df:
+            df[DATE_COLUMN] = pd.to_datetime(df[DATE_COLUMN])
+        yield df
+
+
+def convert(csv_path, data_dir=DATA_DIR):
+    df = read_csv_exact(csv_path)
+    root = write_dataset(df, dataset_path(csv_path, data_dir))
+    # The round trip must give back the same values, bit for bit
+    back = read_dataset(root)
+    expected = df.sort_values(DATE_COLUMN, kind='stable').reset_index(drop=True)
+    for name in expected.select_dtypes(include=[np.number]).columns:
+        a = expected[name].to_numpy(dtype=np.float64)
+        b = back[name].to_numpy(dtype=np.float64)
+        if not np.array_equal(a.view(np.uint64), b.view(np.uint64)):
+            raise ValueError(f"column '{name}' did not round-trip exactly")
+    return root, len(df)
+
+
+def _time(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None or elapsed < best else best
+    return best, len(result)
+
+
+def bench(root, csv_path=None, columns=None, start=None, end=None, repeat=5):
+    # Best-of-repeat load times in ms
+    columns = columns or ['usd_index', 'inflation', 'oil_price', 'interest_rate', 'gold_price']
+    cases = []
+    if csv_path:
+        cases.append(('csv (pandas default)', lambda: pd.read_csv(csv_path)))
+        cases.append(('csv (round_trip floats)', lambda: read_csv_exact(csv_path)))
+    cases.append(('parquet, all columns', lambda: read_dataset(root)))
+    cases.append((f'parquet, {len(columns)} columns', lambda: read_dataset(root, columns)))
+    if start is not None or end is not None:
+        cases.append((f'parquet, {len(columns)} columns, {start or ""}..{end or ""}',
+                      lambda: read_dataset(root, columns + [DATE_COLUMN], start, end)))
+    results = []
+    for name, fn in cases:
+        seconds, rows = _time(fn, repeat)
+        results.append((name, seconds * 1000, rows))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parquet storage for the gold price datasets')
+    commands = parser.add_subparsers(dest='command', required=True)
+    convert_parser = commands.add_parser('convert', help='convert CSVs into date-partitioned Parquet datasets')
+    convert_parser.add_argument('csv', nargs='*', default=['gold_price_data.csv', 'gold_price_clean.csv'])
+    convert_parser.add_argument('--data-dir', default=DATA_DIR)
+    bench_parser = commands.add_parser('bench', help='compare load times of a dataset and its CSV')
+    bench_parser.add_argument('dataset', nargs='?', default=os.path.join(DATA_DIR, 'gold_price_clean'))
+    bench_parser.add_argument('--csv', default='gold_price_clean.csv')
+    bench_parser.add_argument('--columns', help='comma-separated columns for the pruned reads')
+    bench_parser.add_argument('--start', default='2022-01-01')
+    bench_parser.add_argument('--end')
+    bench_parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    if args.command == 'convert':
+        print("Converting to Parquet")
+        print("=" * 60)
+        for path in args.csv:
+            root, rows = convert(path, args.data_dir)
+            size = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(root) for f in files)
+            print(f"✅ {path} -> {root}/ ({rows:,} rows, {size / 2**20:.2f} MB vs "
+                  f"{os.path.getsize(path) / 2**20:.2f} MB CSV, floats exact)")
+    else:
+        print("Load-time Benchmark")
+        print("=" * 60)
+        columns = args.columns.split(',') if args.columns else None
+        print(f"{'read':<45} {'ms':>10} {'rows':>12}")
+        for name, ms, rows in bench(args.dataset, args.csv, columns, args.start, args.end, args.repeat):
+            print(f"{name:<45} {ms:>10.2f} {rows:>12,}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+import os
+import queue
+import random
+import threading
+import time
+
+import numpy as np
+
+# Trying a candidate model on live traffic. Both take a model name from the
+# registry (MODEL_REGISTRY, see registry.py):
+#
+#   SHADOW_MODEL=name     also score SHADOW_FRACTION of /predict and
+#                         /predict/batch requests with this model on
+#                         SHADOW_THREADS background threads; the response
+#                         never waits for it
+#   AB_MODEL=name         answer AB_FRACTION of requests that do not name a
+#                         model with this model instead of the default
+#
+# Shadow results go into a ring buffer of the last SHADOW_BUFFER rows; when
+# more than SHADOW_MAX_PENDING requests are waiting, new ones are dropped
+# rather than queued.
+
+
+class ShadowScorer:
+    def __init__(self, name, resolve, fraction=0.1, threads=1, buffer_rows=10000, max_pending=1000):
+        self.name = name
+        self.resolve = resolve
+        self.fraction = fraction
+        self.threads = threads
+        self._queue = queue.Queue(max_pending)
+        self._lock = threading.Lock()
+        self._pid = None
+
+        # Ring buffer: one row per shadowed prediction
+        self.size = buffer_rows
+        self.primary = np.zeros(buffer_rows)
+        self.candidate = np.zeros(buffer_rows)
+        self.primary_ms = np.full(buffer_rows, np.nan)
+        self.candidate_ms = np.full(buffer_rows, np.nan)
+        self.position = 0
+        self.rows = 0
+        self.requests = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+
+    @classmethod
+    def from_env(cls, resolve):
+        name = os.environ.get('SHADOW_MODEL')
+        if not name:
+            return None
+        return cls(
+            name, resolve,
+            fraction=float(os.environ.get('SHADOW_FRACTION', 0.1)),
+            threads=int(os.environ.get('SHADOW_THREADS', 1)),
+            buffer_rows=int(os.environ.get('SHADOW_BUFFER', 10000)),
+            max_pending=int(os.environ.get('SHADOW_MAX_PENDING', 1000)),
+        )
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so start them once per worker process
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(self._queue.maxsize)
+                for i in range(self.threads):
+                    threading.Thread(target=self._run, name=f'shadow-{i}', daemon=True).start()
+                self._pid = os.getpid()
+
+    def submit(self, X, predictions, seconds=None):
+        # On the request path: a random draw and a non-blocking put
+        if random.random() >= self.fraction:
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((X, predictions, seconds))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def _run(self):
+        while True:
+            X, primary, seconds = self._queue.get()
+            try:
+                _, state = self.resolve(self.name)
+                started = time.perf_counter()
+                candidate = np.asarray(state.scorer.predict(X), dtype=np.float64)
+                elapsed = time.perf_counter() - started
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                continue
+            self._record(np.asarray(primary, dtype=np.float64), candidate, seconds, elapsed)
+
+    def _record(self, primary, candidate, primary_seconds, candidate_seconds):
+        n = len(primary)
+        with self._lock:
+            index = (self.position + np.arange(n)) % self.size
+            self.primary[index] = primary
+            self.candidate[index] = candidate
+            # Latency is per request, so it is kept on the request's first row only
+            self.primary_ms[index] = np.nan
+            self.candidate_ms[index] = np.nan
+            self.primary_ms[index[0]] = primary_seconds * 1000.0 if primary_seconds is not None else np.nan
+            self.candidate_ms[index[0]] = candidate_seconds * 1000.0
+            self.position = (self.position + n) % self.size
+            self.rows += n
+            self.requests += 1
+
+    def stats(self):
+        with self._lock:
+            filled = min(self.rows, self.size)
+            diff = self.candidate[:filled] - self.primary[:filled]
+            primary_ms = self.primary_ms[:filled]
+            candidate_ms = self.candidate_ms[:filled]
+        stats = {
+            'model': self.name,
+            'fraction': self.fraction,
+            'requests': self.requests,
+            'rows': self.rows,
+            'window_rows': filled,
+            'pending': self._queue.qsize(),
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'last_error': self.last_error,
+        }
+        if filled:
+            abs_diff = np.abs(diff)
+            stats['diff'] = {
+                'mean': round(float(diff.mean()), 4),
+                'mean_abs': round(float(abs_diff.mean()), 4),
+                'p99_abs': round(float(np.percentile(abs_diff, 99)), 4),
+                'max_abs': round(float(abs_diff.max()), 4),
+            }
+            stats['latency_ms'] = {
+                'primary': _latency_summary(primary_ms),
+                'shadow': _latency_summary(candidate_ms),
+            }
+        return stats
+
+
+def _latency_summary(ms):
+    # Cache hits have no primary model time and are left out
+    ms = ms[~np.isnan(ms)]
+    if not len(ms):
+        return None
+    p50, p99 = np.percentile(ms, [50, 99])
+    return {'p50': round(float(p50), 4), 'p99': round(float(p99), 4), 'mean': round(float(ms.mean()), 4)}
+
+
+class ABSplit:
+    def __init__(self, name, fraction):
+        self.name = name
+        self.fraction = fraction
+        self.assigned = 0
+
+    @classmethod
+    def from_env(cls):
+        name = os.environ.get('AB_MODEL')
+        if not name:
+            return None
+        return cls(name, float(os.environ.get('AB_FRACTION', 0.05)))
+
+    def choose(self):
+        # The model name for this request, or None to use the default
+        if random.random() < self.fraction:
+            self.assigned += 1
+            return self.name
+        return None
+
+    def stats(self):
+        return {'model': self.name, 'fraction': self.fraction, 'assigned': self.assigned}
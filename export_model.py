@@ -0,0 +1,71 @@
+import argparse
+import sys
+import joblib
+import pickle
+import numpy as np
+import pandas as pd
+from artifact import load_predictor, save_artifact
+from compiled import compile_scorer, save_fused
+from inference import FEATURES, SklearnScorer, sample_inputs
+
+parser = argparse.ArgumentParser(description='Convert model.pkl + scaler.pkl into a fused predictor artifact')
+parser.add_argument('--model', default='gold_price_model.pkl')
+parser.add_argument('--scaler', default='scaler.pkl')
+parser.add_argument('--data', default='gold_price_clean.csv',
+                    help='cleaned data used to refit the scaler if it cannot be loaded')
+parser.add_argument('--format', choices=['dir', 'npz'], default='dir',
+                    help="'dir': versioned header.json + .npy files (memory-mappable); 'npz': single file")
+parser.add_argument('--output', default=None,
+                    help='defaults to gold_price_model/ (dir) or gold_price_fused.npz (npz)')
+args = parser.parse_args()
+output = args.output or ('gold_price_model' if args.format == 'dir' else 'gold_price_fused.npz')
+
+print("="*60)
+print("Exporting Fused Predictor")
+print("="*60)
+
+
+def load(path):
+    # Same fallbacks as app.py: joblib first, then plain pickle
+    try:
+        return joblib.load(path)
+    except Exception:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+
+model = load(args.model)
+print(f"✅ Model loaded: {type(model).__name__}")
+
+try:
+    scaler = load(args.scaler)
+    print(f"✅ Scaler loaded: {type(scaler).__name__}")
+except Exception as e:
+    # Same repair as fix_model.py, but fitted on the model's feature columns
+    print(f"⚠️ Scaler could not be loaded ({e}), refitting on {args.data}")
+    from sklearn.preprocessing import StandardScaler
+    scaler = StandardScaler().fit(pd.read_csv(args.data)[FEATURES].values)
+    print(f"   Mean: {scaler.mean_}")
+    print(f"   Scale: {scaler.scale_}")
+
+# Fold the scaler into the model; compile_scorer checks it against sklearn
+scorer = compile_scorer(model, scaler)
+if scorer.kind == 'sklearn':
+    print("❌ This model type cannot be fused, keep serving the .pkl files")
+    sys.exit(1)
+
+if args.format == 'dir':
+    header = save_artifact(scorer, output, source={'model': args.model, 'scaler': args.scaler})
+    print(f"✅ Saved {scorer.kind} predictor version {header['version']} to {output}/")
+else:
+    save_fused(scorer, output)
+    print(f"✅ Saved {scorer.kind} predictor as {output}")
+
+# Test the exported artifact against the original model + scaler
+print("\nTesting exported predictor...")
+fused = load_predictor(output)
+X = sample_inputs(10000, seed=1)
+diff = np.abs(fused.predict(X) - SklearnScorer(model, scaler).predict(X)).max()
+print(f"✅ Max difference vs model + scaler on {len(X)} rows: {diff:.3e}")
+print(f"✅ Sample prediction: ${fused.predict(np.array([[95.5, 3.2, 78.3, 2.75]]))[0]:.2f}")
+print("="*60)
@@ -0,0 +1,270 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+
+from cleaning import DATE_COLUMN
+from datastore import iter_frames
+from inference import FEATURES
+
+# Memory-mapped feature store: the cleaned feature matrix and target, written
+# once and then shared by every experiment through the page cache.
+#
+#   features/header.json   shapes, dtype, date range, content version
+#   features/X.bin         (rows, 4) feature matrix, row-major
+#   features/y.bin         (rows,) target (gold_price)
+#   features/dates.bin     (rows,) datetime64[D], sorted: the date index
+#   features/scaled-<hash>.bin   X standardized with one scaler's parameters
+#
+# Rows are stored in date order, so a date range, a chronological train/test
+# split and every walk-forward fold is a contiguous block of rows: a NumPy
+# view of the memmap, no copy. Scaling has to produce new values; it is done
+# once per scaler into scaled-<hash>.bin (chunk by chunk), and views of that
+# file are served from then on. Raw .bin files are used instead of .npy
+# because the row count is only known once the input has been streamed.
+#
+#   python featurestore.py build gold_price_clean.csv
+#   python featurestore.py build data/gold_price_clean --dtype float32
+
+FORMAT_NAME = 'gold-price-features'
+FORMAT_VERSION = 1
+HEADER_FILE = 'header.json'
+TARGET = 'gold_price'
+STORE_PATH = 'features'
+CHUNK_ROWS = 256 * 1024
+
+
+class FeatureStore:
+    def __init__(self, path, header):
+        self.path = path
+        self.header = header
+        self.rows = header['rows']
+        self.features = header['features']
+        self.dtype = np.dtype(header['dtype'])
+        self.version = header['version']
+        self.X = self._map('X', (self.rows, len(self.features)))
+        self.y = self._map('y', (self.rows,))
+        self.dates = self._map('dates', (self.rows,), np.dtype('datetime64[D]'))
+
+    def _map(self, name, shape, dtype=None):
+        dtype = dtype or self.dtype
+        if not shape[0]:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.path, name + '.bin'), dtype=dtype, mode='r', shape=shape)
+
+    @classmethod
+    def open(cls, path=STORE_PATH):
+        with open(os.path.join(path, HEADER_FILE)) as f:
+            header = json.load(f)
+        if header.get('format') != FORMAT_NAME:
+            raise ValueError(f'{path} is not a {FORMAT_NAME} store')
+        if header.get('format_version', 0) > FORMAT_VERSION:
+            raise ValueError(f"feature store format version {header['format_version']} is newer than "
+                             f"supported ({FORMAT_VERSION})")
+        return cls(path, header)
+
+    def rows_between(self, start=None, end=None):
+        # slice of the rows with start <= date < end, by binary search on the index
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(start, 'D'), 'left'))
+        hi = self.rows if end is None else int(np.searchsorted(self.dates, np.datetime64(end, 'D'), 'left'))
+        return slice(lo, max(lo, hi))
+
+    def select(self, start=None, end=None, X=None):
+        rows = self.rows_between(start, end)
+        return (self.X if X is None else X)[rows], self.y[rows]
+
+    def split(self, test_size=0.2, start=None, end=None, X=None):
+        # Chronological split (the notebook's shuffle=False): the last
+        # test_size of the range is the test set. X_train, X_test, y_train, y_test.
+        rows = self.rows_between(start, end)
+        n = rows.stop - rows.start
+        cut = rows.start + n - int(np.ceil(n * test_size))
+        X = self.X if X is None else X
+        return X[rows.start:cut], X[cut:rows.stop], self.y[rows.start:cut], self.y[cut:rows.stop]
+
+    def folds(self, n_splits=5, start=None, end=None):
+        # Walk-forward backtest folds like sklearn's TimeSeriesSplit, as
+        # (train slice, test slice): each fold trains on everything before it
+        rows = self.rows_between(start, end)
+        n = rows.stop - rows.start
+        test = n // (n_splits + 1)
+        for i in range(n_splits):
+            cut = rows.start + n - (n_splits - i) * test
+            yield slice(rows.start, cut), slice(cut, cut + test)
+
+    def column_stats(self, rows=slice(None), chunk_rows=CHUNK_ROWS):
+        # Mean and standard deviation per feature (ddof=0, like StandardScaler),
+        # accumulated chunk by chunk with Chan's pairwise update
+        X = self.X[rows]
+        count = 0
+        mean = np.zeros(X.shape[1])
+        m2 = np.zeros(X.shape[1])
+        for i in range(0, len(X), chunk_rows):
+            block = np.asarray(X[i:i + chunk_rows], dtype=np.float64)
+            n = len(block)
+            block_mean = block.mean(axis=0)
+            block_m2 = ((block - block_mean) ** 2).sum(axis=0)
+            delta = block_mean - mean
+            total = count + n
+            mean = mean + delta * n / total
+            m2 = m2 + block_m2 + delta ** 2 * count * n / total
+            count = total
+        return mean, np.sqrt(m2 / count) if count else m2
+
+    def scaled(self, mean, scale, chunk_rows=CHUNK_ROWS):
+        # (X - mean) / scale for all rows as a read-only memmap, written on first
+        # use. Take train/test views of it with split(X=...) or select(X=...).
+        mean = np.asarray(mean, dtype=np.float64)
+        scale = np.asarray(scale, dtype=np.float64)
+        scale = np.where(scale == 0, 1.0, scale)
+        key = hashlib.sha256(mean.tobytes() + scale.tobytes()).hexdigest()[:12]
+        path = os.path.join(self.path, f'scaled-{key}.bin')
+        if not os.path.exists(path):
+            tmp = path + '.tmp'
+            out = np.memmap(tmp, dtype=self.dtype, mode='w+', shape=self.X.shape) if self.rows else None
+            for i in range(0, self.rows, chunk_rows):
+                block = np.asarray(self.X[i:i + chunk_rows], dtype=np.float64)
+                out[i:i + chunk_rows] = (block - mean) / scale
+            if out is not None:
+                out.flush()
+                del out
+            else:
+                open(tmp, 'wb').close()
+            os.replace(tmp, path)
+        if not self.rows:
+            return np.empty(self.X.shape, dtype=self.dtype)
+        return np.memmap(path, dtype=self.dtype, mode='r', shape=self.X.shape)
+
+    def info(self):
+        return {key: self.header[key] for key in ('rows', 'features', 'target', 'dtype', 'version',
+                                                  'first_date', 'last_date', 'source', 'created')}
+
+
+def build(source, path=STORE_PATH, dtype='float64', chunk_rows=CHUNK_ROWS):
+    # Streams source (a cleaned CSV or a Parquet dataset, see datastore.py) into
+    # a new store. Rows with a missing feature or target are skipped. Input
+    # that is not in date order is sorted afterwards through the memmaps.
+    dtype = np.dtype(dtype)
+    tmp_path = path.rstrip('/') + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    rows = skipped = 0
+    ordered = True
+    last = None
+    files = {name: open(os.path.join(tmp_path, name + '.bin'), 'wb') for name in ('X', 'y', 'dates')}
+    try:
+        for df in iter_frames(source, FEATURES + [TARGET, DATE_COLUMN], chunk_rows):
+            X = df[FEATURES].to_numpy(dtype=np.float64)
+            y = df[TARGET].to_numpy(dtype=np.float64)
+            dates = df[DATE_COLUMN].to_numpy().astype('datetime64[D]')
+            valid = np.isfinite(X).all(axis=1) & np.isfinite(y) & ~np.isnat(dates)
+            skipped += int((~valid).sum())
+            X, y, dates = X[valid].astype(dtype), y[valid].astype(dtype), dates[valid]
+            if len(dates):
+                ordered = ordered and (last is None or dates[0] >= last) and bool((np.diff(dates) >= 0).all())
+                last = dates[-1]
+            for name, array in (('X', X), ('y', y), ('dates', dates)):
+                files[name].write(np.ascontiguousarray(array).tobytes())
+            rows += len(y)
+    finally:
+        for f in files.values():
+            f.close()
+
+    if not ordered:
+        _sort_by_date(tmp_path, rows, dtype, chunk_rows)
+
+    dates = np.memmap(os.path.join(tmp_path, 'dates.bin'), dtype='datetime64[D]', mode='r') if rows else None
+    header = {
+        'format': FORMAT_NAME,
+        'format_version': FORMAT_VERSION,
+        'rows': rows,
+        'skipped_rows': skipped,
+        'features': FEATURES,
+        'target': TARGET,
+        'dtype': dtype.name,
+        'version': _content_version(tmp_path),
+        'first_date': str(dates[0]) if rows else None,
+        'last_date': str(dates[-1]) if rows else None,
+        'source': source,
+        'created': datetime.now().isoformat(),
+    }
+    del dates
+    with open(os.path.join(tmp_path, HEADER_FILE), 'w') as f:
+        json.dump(header, f, indent=2)
+
+    # Same directory swap as artifact.save_artifact
+    old_path = path.rstrip('/') + '.old'
+    if os.path.exists(path):
+        shutil.rmtree(old_path, ignore_errors=True)
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return FeatureStore.open(path)
+
+
+def _content_version(path):
+    # Hash of the stored arrays, so the same data gives the same version
+    # whatever the input format or order
+    digest = hashlib.sha256()
+    for name in ('X', 'y', 'dates'):
+        with open(os.path.join(path, name + '.bin'), 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def _sort_by_date(path, rows, dtype, chunk_rows):
+    # Stable sort, so rows with the same date keep their input order. Only the
+    # permutation is held in memory; the arrays are gathered chunk by chunk.
+    shapes = {'X': ((rows, len(FEATURES)), dtype), 'y': ((rows,), dtype), 'dates': ((rows,), np.dtype('datetime64[D]'))}
+    dates = np.fromfile(os.path.join(path, 'dates.bin'), dtype='datetime64[D]')
+    order = np.argsort(dates, kind='stable')
+    del dates
+    for name, (shape, array_dtype) in shapes.items():
+        source = np.memmap(os.path.join(path, name + '.bin'), dtype=array_dtype, mode='r', shape=shape)
+        target = np.memmap(os.path.join(path, name + '.sorted'), dtype=array_dtype, mode='w+', shape=shape)
+        for i in range(0, rows, chunk_rows):
+            target[i:i + chunk_rows] = source[order[i:i + chunk_rows]]
+        target.flush()
+        del source, target
+        os.replace(os.path.join(path, name + '.sorted'), os.path.join(path, name + '.bin'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory-mapped feature store for training and backtests')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_parser = commands.add_parser('build', help='write the feature matrix and target from cleaned data')
+    build_parser.add_argument('source', nargs='?', default='gold_price_clean.csv',
+                              help='cleaned CSV or Parquet dataset directory')
+    build_parser.add_argument('--output', default=STORE_PATH)
+    build_parser.add_argument('--dtype', choices=['float64', 'float32'], default='float64')
+    build_parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    info_parser = commands.add_parser('info', help='show a store')
+    info_parser.add_argument('path', nargs='?', default=STORE_PATH)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    if args.command == 'build':
+        print("Building Feature Store")
+        print("=" * 60)
+        store = build(args.source, args.output, args.dtype, args.chunk_rows)
+        size = sum(os.path.getsize(os.path.join(args.output, name + '.bin')) for name in ('X', 'y', 'dates'))
+        print(f"✅ {store.rows:,} rows x {len(store.features)} features ({store.dtype.name}, {size / 2**20:.1f} MB) "
+              f"-> {args.output}/")
+        if store.header['skipped_rows']:
+            print(f"⚠️ Skipped {store.header['skipped_rows']:,} rows with missing values")
+        print(f"✅ {store.header['first_date']} .. {store.header['last_date']}, version {store.version}")
+    else:
+        print("Feature Store")
+        print("=" * 60)
+        for key, value in FeatureStore.open(args.path).info().items():
+            print(f"{key:<12} {value}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+import sys
+import time
+
+import numpy as np
+
+from inference import FEATURE_RANGES, FEATURES, sample_inputs
+
+
+class GridScorer:
+    # Predictions precomputed on a regular 4-D lattice over the UI ranges and
+    # answered by multilinear interpolation. Rows outside the lattice go to the
+    # wrapped scorer, so the grid never extrapolates.
+    kind = 'grid'
+
+    def __init__(self, scorer, points):
+        self.base = scorer
+        self.points = tuple(int(p) for p in points)
+        self.low = np.array([FEATURE_RANGES[name][0] for name in FEATURES])
+        self.high = np.array([FEATURE_RANGES[name][1] for name in FEATURES])
+        self.step = (self.high - self.low) / (np.array(self.points) - 1)
+        self.strides = np.array([int(np.prod(self.points[d + 1:])) for d in range(len(self.points))])
+        # The 16 corners of a cell as 0/1 offsets per dimension, and their
+        # offsets into the flattened values array
+        self.corners = np.array(np.meshgrid(*[[0, 1]] * len(self.points), indexing='ij')).reshape(len(self.points), -1).T.astype(bool)
+        self.corner_offsets = self.corners @ self.strides
+        self.max_index = np.array(self.points) - 2
+
+        started = time.perf_counter()
+        axes = [np.linspace(lo, hi, n) for lo, hi, n in zip(self.low, self.high, self.points)]
+        lattice = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, len(FEATURES))
+        self.values = np.ascontiguousarray(scorer.predict(lattice), dtype=np.float32)
+        self.build_seconds = time.perf_counter() - started
+        self.max_abs_error = None
+        self.mean_abs_error = None
+
+    def _interpolate(self, X):
+        position = (X - self.low) / self.step
+        index = np.minimum(position.astype(np.intp), self.max_index)
+        fraction = (position - index)[:, None, :]
+        weights = np.where(self.corners, fraction, 1.0 - fraction).prod(axis=2)
+        values = self.values[(index @ self.strides)[:, None] + self.corner_offsets]
+        return (weights * values).sum(axis=1)
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        inside = ((X >= self.low) & (X <= self.high)).all(axis=1)
+        if inside.all():
+            return self._interpolate(X)
+        result = np.empty(len(X))
+        if inside.any():
+            result[inside] = self._interpolate(X[inside])
+        result[~inside] = self.base.predict(X[~inside])
+        return result
+
+    def measure_error(self, rows=20000):
+        # Random points plus every cell centre, where interpolation is weakest
+        X = sample_inputs(rows, seed=7)
+        centres = [np.linspace(lo + s / 2, hi - s / 2, n - 1)
+                   for lo, hi, s, n in zip(self.low, self.high, self.step, self.points)]
+        grid = np.stack(np.meshgrid(*centres, indexing='ij'), axis=-1).reshape(-1, len(FEATURES))
+        if len(grid) > rows:
+            grid = grid[np.random.default_rng(7).choice(len(grid), rows, replace=False)]
+        X = np.vstack([X, grid])
+        error = np.abs(self._interpolate(X) - self.base.predict(X))
+        self.max_abs_error = float(error.max())
+        self.mean_abs_error = float(error.mean())
+        return self.max_abs_error
+
+    def stats(self):
+        return {
+            'points': list(self.points),
+            'bytes': int(self.values.nbytes),
+            'build_seconds': round(self.build_seconds, 3),
+            'max_abs_error': self.max_abs_error,
+            'mean_abs_error': self.mean_abs_error,
+        }
+
+
+def parse_points(value):
+    # "16" -> 16 points on every axis, "21,15,17,22" -> per axis
+    points = [int(p) for p in str(value).split(',')]
+    if len(points) == 1:
+        points = points * len(FEATURES)
+    if len(points) != len(FEATURES) or min(points) < 2:
+        raise ValueError(f'grid needs 1 or {len(FEATURES)} point counts of at least 2, got {value!r}')
+    return points
+
+
+if __name__ == '__main__':
+    # Compare resolutions to pick PREDICTION_GRID: python grid.py 8 12 16 24
+    from loader import load_state
+
+    state = load_state()
+    print("\n" + "="*60)
+    print(f"{'Points':<16} {'Size':<12} {'Build (s)':<12} {'Max err ($)':<14} {'Mean err ($)':<12}")
+    print("-"*60)
+    for value in sys.argv[1:] or ['8', '12', '16', '24']:
+        grid = GridScorer(state.scorer, parse_points(value))
+        grid.measure_error()
+        size = f"{grid.values.nbytes / 1024:.0f} KB"
+        print(f"{value:<16} {size:<12} {grid.build_seconds:<12.3f} {grid.max_abs_error:<14.4f} {grid.mean_abs_error:<12.4f}")
+    print("="*60)
@@ -0,0 +1,44 @@
+import gc
+import os
+
+# Build the app (load + warm the model) once in the master before forking, so
+# every worker starts from the same copy-on-write pages instead of loading its own
+wsgi_app = os.environ.get('GUNICORN_APP', 'app:create_app()')
+preload_app = True
+# Tells service.init() to load in the master even with STARTUP_MODE=background
+os.environ['GUNICORN_PRELOAD'] = '1'
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+# 'sync' for the Flask app; 'uvicorn.workers.UvicornWorker' with GUNICORN_APP='asgi:create_app()'
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+
+
+def when_ready(server):
+    # Move everything loaded so far into a permanent generation. The cyclic GC
+    # then never writes to those objects' headers in the workers, which would
+    # otherwise copy the shared pages one by one.
+    import metrics
+    import service
+    metrics.clear_stale_files()
+    # Hot-reload triggers in any process (watcher, /admin/reload) become a
+    # SIGHUP to this master; see on_reload
+    service.gunicorn_master_pid = server.pid
+    gc.collect()
+    gc.freeze()
+    server.log.info('Model preloaded in master; %d objects frozen', gc.get_freeze_count())
+
+
+def on_reload(server):
+    # SIGHUP: load, validate and warm the new model here before gunicorn forks
+    # the replacement workers, which then share it copy-on-write. Old workers
+    # finish their in-flight requests on the old model and exit gracefully.
+    import service
+    body, status = service.reload(force=True)
+    server.log.info('Model reload: %s', body)
+    gc.collect()
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    from procinfo import memory_usage
+    worker.log.info('Worker %s memory: %s', worker.pid, memory_usage())
@@ -0,0 +1,115 @@
+import numpy as np
+
+from profiling import mark
+
+# Feature order expected by the scaler and model (see notebook Step 7)
+FEATURES = ['usd_index', 'inflation', 'oil_price', 'interest_rate']
+
+# Values /predict falls back to when a feature is missing (the UI sample data)
+DEFAULTS = {
+    'usd_index': 95.5,
+    'inflation': 3.2,
+    'oil_price': 78.3,
+    'interest_rate': 2.75,
+}
+
+# Input ranges shown in the UI and used to generate the notebook data
+FEATURE_RANGES = {
+    'usd_index': (85.0, 105.0),
+    'inflation': (1.5, 8.5),
+    'oil_price': (40.0, 120.0),
+    'interest_rate': (0.25, 5.5),
+}
+
+
+class BatchTooLarge(ValueError):
+    pass
+
+
+class SklearnScorer:
+    kind = 'sklearn'
+
+    def __init__(self, model, scaler):
+        self.model = model
+        self.scaler = scaler
+
+    def predict(self, X):
+        # One scaler pass and one model call for the whole matrix
+        scaled = self.scaler.transform(X)
+        mark('scale')
+        return self.model.predict(scaled)
+
+
+def sample_inputs(n, seed=0):
+    # Uniform rows across the UI feature ranges
+    rng = np.random.default_rng(seed)
+    low = np.array([FEATURE_RANGES[name][0] for name in FEATURES])
+    high = np.array([FEATURE_RANGES[name][1] for name in FEATURES])
+    return rng.uniform(low, high, size=(n, len(FEATURES)))
+
+
+def _column(values, name, errors, offset=0):
+    # Fast path: the whole column converts in one numpy call. Nested lists of
+    # equal length convert too, into a 2-D array, so the shape is checked.
+    try:
+        result = np.asarray(values, dtype=np.float64)
+        if result.ndim == 1 and len(result) == len(values):
+            return result
+    except (TypeError, ValueError):
+        pass
+
+    # Slow path: find the offending rows and report them by index
+    column = np.empty(len(values), dtype=np.float64)
+    for i, value in enumerate(values):
+        try:
+            column[i] = float(value)
+        except (TypeError, ValueError):
+            column[i] = np.nan
+            errors.setdefault(offset + i, f"invalid value for '{name}': {value!r}")
+    return column
+
+
+def parse_batch(data, max_rows=None):
+    # Accepts either a list of row objects or an object of equal-length columns.
+    # Returns the (n, 4) feature matrix and a {row index: message} dict of rows
+    # that must not be scored.
+    errors = {}
+
+    if isinstance(data, list):
+        n = len(data)
+        if max_rows is not None and n > max_rows:
+            raise BatchTooLarge(f'batch of {n} rows exceeds the limit of {max_rows}')
+        for i, row in enumerate(data):
+            if not isinstance(row, dict):
+                errors[i] = 'row must be a JSON object'
+        rows = [row if isinstance(row, dict) else {} for row in data]
+        columns = [
+            _column([row.get(name, DEFAULTS[name]) for row in rows], name, errors)
+            for name in FEATURES
+        ]
+    elif isinstance(data, dict):
+        lengths = {len(v) for v in data.values() if isinstance(v, list)}
+        if len(lengths) > 1:
+            raise ValueError('columnar batch has columns of different lengths')
+        n = lengths.pop() if lengths else 0
+        if max_rows is not None and n > max_rows:
+            raise BatchTooLarge(f'batch of {n} rows exceeds the limit of {max_rows}')
+        columns = []
+        for name in FEATURES:
+            values = data.get(name, [DEFAULTS[name]] * n)
+            if not isinstance(values, list):
+                raise ValueError(f"column '{name}' must be a list")
+            columns.append(_column(values, name, errors))
+    else:
+        raise ValueError('batch must be a JSON array of rows or an object of columns')
+
+    X = np.column_stack(columns) if n else np.empty((0, len(FEATURES)))
+
+    # Non-finite values (NaN, inf) are rejected in one vectorized pass
+    bad = np.flatnonzero(~np.isfinite(X).all(axis=1))
+    for i in bad.tolist():
+        if i not in errors:
+            name = FEATURES[int(np.flatnonzero(~np.isfinite(X[i]))[0])]
+            errors[i] = f"non-finite value for '{name}'"
+
+    return X, errors
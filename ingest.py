@@ -0,0 +1,326 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from cleaning import FILL_MEAN_COLUMNS, IQR_FACTOR, QUANTILES, CleaningStats, apply_stats, clean_csv, \
+    numeric_columns, parse_dates, row_fingerprints
+
+# Append-only ingestion: new daily rows are appended to gold_price_data.csv and
+# their cleaned version to gold_price_clean.csv, without rereading the history.
+# The statistics cleaning.py computes over the whole file are kept as running
+# state next to the data instead:
+#
+#   <data>.ingest.json     row counts, per-column count/sum/missing for the
+#                          mean fill, one quantile sketch per numeric column
+#   <data>.fingerprints    64-bit hash of every distinct row seen (uint64,
+#                          sorted, memory-mapped and binary-searched)
+#   <data>.fingerprints.log   hashes added since the last merge (unsorted)
+#
+#   python ingest.py new_rows.csv
+#   python ingest.py --init          # rebuild the state (and the clean file) from the data
+#
+# New rows are cleaned with the statistics as of their arrival; rows already
+# in the clean file are not re-clipped. Run cleaning.py for an exact rebuild.
+
+SKETCH_K = 2048
+CHUNK_ROWS = 100000
+# The log is merged into the sorted file once it outgrows both of these
+LOG_MIN_ROWS = 65536
+LOG_FRACTION = 0.1
+
+
+class QuantileSketch:
+    # KLL sketch: level h holds items that each stand for 2**h values. A level
+    # that reaches its capacity is sorted and every other item (random offset)
+    # moves up a level. Until the first compaction the sketch is exact, and
+    # quantiles match pandas' linear interpolation.
+
+    def __init__(self, k=SKETCH_K, levels=None, count=0, seed=None):
+        self.k = k
+        self.levels = levels or [np.empty(0)]
+        self.count = count
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, h):
+        depth = len(self.levels) - h - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.count += len(values)
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) >= self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                level = np.sort(level)
+                # An odd item out stays behind so the total weight is preserved
+                keep = level[-1:] if len(level) % 2 else level[:0]
+                paired = level[:len(level) - len(keep)]
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], paired[self._rng.integers(2)::2]])
+                self.levels[h] = keep
+            h += 1
+
+    def quantiles(self, qs, extra=()):
+        # extra: (value, weight) pairs counted as if they had been inserted,
+        # e.g. the mean standing in for filled missing values
+        values = list(self.levels) + [np.array([v]) for v, _ in extra]
+        weights = [np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)]
+        weights += [np.array([float(w)]) for _, w in extra]
+        values = np.concatenate(values)
+        weights = np.concatenate(weights)
+        if not len(values):
+            return [np.nan] * len(qs)
+        order = np.argsort(values, kind='stable')
+        values = values[order]
+        weights = weights[order]
+        # Mean rank covered by each item; with unit weights this is 0..n-1
+        ranks = np.cumsum(weights) - (weights + 1) / 2
+        total = weights.sum()
+        return [float(np.interp(q * (total - 1), ranks, values)) for q in qs]
+
+    def to_dict(self):
+        return {'k': self.k, 'count': self.count, 'levels': [level.tolist() for level in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['k'], [np.array(level, dtype=np.float64) for level in data['levels']], data['count'])
+
+
+class IngestState:
+    def __init__(self, data_path, k=SKETCH_K):
+        self.data_path = data_path
+        self.state_path = data_path + '.ingest.json'
+        self.fingerprints_path = data_path + '.fingerprints'
+        self.log_path = self.fingerprints_path + '.log'
+        self.k = k
+        self.columns = None
+        self.numeric = None
+        self.rows = 0
+        self.distinct = 0
+        self.fill = {}
+        self.sketches = {}
+        self._base = np.empty(0, dtype=np.uint64)
+        self._log = np.empty(0, dtype=np.uint64)
+        self._session = set()
+        self._new_fingerprints = []
+
+    def exists(self):
+        return os.path.exists(self.state_path) and os.path.exists(self.fingerprints_path)
+
+    def load(self):
+        with open(self.state_path) as f:
+            data = json.load(f)
+        self.k = data['k']
+        self.columns = data['columns']
+        self.numeric = data['numeric']
+        self.rows = data['rows']
+        self.distinct = data['distinct']
+        self.fill = data['fill']
+        self.sketches = {name: QuantileSketch.from_dict(s) for name, s in data['sketches'].items()}
+        if not data.get('fingerprints_sorted'):
+            # State from before the sorted file: sort it once
+            self._write_base(np.unique(np.fromfile(self.fingerprints_path, dtype=np.uint64)))
+        # The history is only mapped, not read: a lookup touches the pages of
+        # its binary search. The log is small and read whole.
+        self._base = self._map_base()
+        self._log = np.sort(np.fromfile(self.log_path, dtype=np.uint64)) if os.path.exists(self.log_path) \
+            else np.empty(0, dtype=np.uint64)
+        self._session = set()
+        return self
+
+    def _map_base(self):
+        if not os.path.getsize(self.fingerprints_path):
+            return np.empty(0, dtype=np.uint64)
+        return np.memmap(self.fingerprints_path, dtype=np.uint64, mode='r')
+
+    def _write_base(self, fingerprints):
+        self._base = None
+        tmp = self.fingerprints_path + '.tmp'
+        fingerprints.tofile(tmp)
+        os.replace(tmp, self.fingerprints_path)
+
+    def _seen(self, fingerprints):
+        # Boolean mask of the fingerprints already in the history
+        seen = np.zeros(len(fingerprints), dtype=bool)
+        for known in (self._base, self._log):
+            if len(known):
+                i = np.minimum(np.searchsorted(known, fingerprints), len(known) - 1)
+                seen |= np.asarray(known[i]) == fingerprints
+        if self._session:
+            seen |= np.fromiter((h in self._session for h in fingerprints.tolist()), dtype=bool,
+                                count=len(fingerprints))
+        return seen
+
+    def save(self):
+        # New fingerprints are appended to the log, which is merged into the
+        # sorted file once it is large enough; the JSON is replaced atomically
+        if not os.path.exists(self.fingerprints_path):
+            self._write_base(np.empty(0, dtype=np.uint64))
+            self._base = self._map_base()
+        if self._new_fingerprints:
+            with open(self.log_path, 'ab') as f:
+                for fingerprints in self._new_fingerprints:
+                    f.write(fingerprints.tobytes())
+            self._new_fingerprints = []
+            self._log = np.sort(np.fromfile(self.log_path, dtype=np.uint64))
+            self._session = set()
+            if len(self._log) > max(LOG_MIN_ROWS, LOG_FRACTION * len(self._base)):
+                # A crash between the two steps leaves hashes in both files,
+                # which only costs a duplicate entry until the next merge
+                self._write_base(np.unique(np.concatenate([self._base, self._log])))
+                os.remove(self.log_path)
+                self._base = self._map_base()
+                self._log = np.empty(0, dtype=np.uint64)
+        data = {
+            'k': self.k,
+            'columns': self.columns,
+            'numeric': self.numeric,
+            'rows': self.rows,
+            'distinct': self.distinct,
+            'fill': self.fill,
+            'sketches': {name: sketch.to_dict() for name, sketch in self.sketches.items()},
+            'fingerprints_sorted': True,
+        }
+        tmp = self.state_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, self.state_path)
+
+    def reset(self, df):
+        self.columns = list(df.columns)
+        self.numeric = numeric_columns(df)
+        self.rows = 0
+        self.distinct = 0
+        self.fill = {name: {'count': 0, 'sum': 0.0, 'missing': 0} for name in FILL_MEAN_COLUMNS if name in df}
+        self.sketches = {name: QuantileSketch(self.k) for name in self.numeric}
+        self._base = np.empty(0, dtype=np.uint64)
+        self._log = np.empty(0, dtype=np.uint64)
+        self._session = set()
+        self._new_fingerprints = []
+        for path in (self.fingerprints_path, self.log_path, self.state_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def add(self, df):
+        # Updates the state with a parsed chunk; returns the rows not seen before
+        # (first occurrence wins, within the chunk too)
+        df = df[self.columns]
+        fingerprints = row_fingerprints(df, self.numeric)
+        mask = ~pd.Series(fingerprints).duplicated().to_numpy()
+        mask[mask] = ~self._seen(fingerprints[mask])
+        fresh = fingerprints[mask]
+        self._session.update(fresh.tolist())
+        self._new_fingerprints.append(fresh)
+        df = df[mask]
+        self.rows += len(mask)
+        self.distinct += len(df)
+
+        for name, fill in self.fill.items():
+            values = df[name].to_numpy(dtype=np.float64)
+            missing = np.isnan(values)
+            fill['count'] += int((~missing).sum())
+            fill['sum'] += float(values[~missing].sum())
+            fill['missing'] += int(missing.sum())
+        for name, sketch in self.sketches.items():
+            sketch.update(df[name].to_numpy(dtype=np.float64))
+        return df
+
+    def stats(self):
+        # CleaningStats from the running state: the mean fill from count/sum,
+        # the IQR bounds from the sketches with the filled values counted in
+        means = {name: fill['sum'] / fill['count'] if fill['count'] else np.nan for name, fill in self.fill.items()}
+        lower = {}
+        upper = {}
+        for name, sketch in self.sketches.items():
+            extra = [(means[name], self.fill[name]['missing'])] if self.fill.get(name, {}).get('missing') else []
+            q1, q3 = sketch.quantiles(QUANTILES, extra)
+            lower[name] = q1 - IQR_FACTOR * (q3 - q1)
+            upper[name] = q3 + IQR_FACTOR * (q3 - q1)
+        return CleaningStats(means, lower, upper)
+
+
+def initialize(data_path, clean_path, k=SKETCH_K, chunk_rows=CHUNK_ROWS):
+    # One pass over the existing data to build the state, then an exact
+    # cleaning.py run so the clean file and the state agree
+    state = IngestState(data_path, k)
+    for i, chunk in enumerate(pd.read_csv(data_path, chunksize=chunk_rows)):
+        chunk = parse_dates(chunk)
+        if i == 0:
+            state.reset(chunk)
+        state.add(chunk)
+    state.save()
+    clean_csv(data_path, clean_path, chunk_rows)
+    return state
+
+
+def ingest(new_path, data_path, clean_path, k=SKETCH_K):
+    # Appends new_path to the data and clean files; returns a summary dict
+    started = time.perf_counter()
+    state = IngestState(data_path, k)
+    if not state.exists():
+        print(f"⚠️ No ingestion state for {data_path}, building it from the full data (one time)")
+        initialize(data_path, clean_path, k)
+    state.load()
+
+    raw = pd.read_csv(new_path)
+    missing = [name for name in state.columns if name not in raw]
+    if missing:
+        raise ValueError(f'{new_path} has no column(s) {missing}')
+    raw = raw[state.columns]
+    # The raw file keeps every row as received, duplicates included
+    raw.to_csv(data_path, mode='a', header=False, index=False)
+
+    fresh = state.add(parse_dates(raw.copy()))
+    stats = state.stats()
+    apply_stats(fresh, stats).to_csv(clean_path, mode='a', header=False, index=False)
+    # State last: a crash before this point leaves it at the previous ingest
+    state.save()
+    return {
+        'rows': len(raw),
+        'duplicates': len(raw) - len(fresh),
+        'appended': len(fresh),
+        'total_rows': state.rows,
+        'total_distinct': state.distinct,
+        'seconds': round(time.perf_counter() - started, 3),
+        'stats': stats.to_dict(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Append new rows to the raw and cleaned data incrementally')
+    parser.add_argument('input', nargs='?', help='CSV of new rows with the same columns as the data')
+    parser.add_argument('--data', default='gold_price_data.csv')
+    parser.add_argument('--clean', default='gold_price_clean.csv')
+    parser.add_argument('--init', action='store_true', help='rebuild the state and the clean file from --data')
+    parser.add_argument('--sketch-k', type=int, default=SKETCH_K, help='quantile sketch size (accuracy vs. state size)')
+    args = parser.parse_args()
+    if not args.input and not args.init:
+        parser.error('give a CSV of new rows, or --init')
+
+    print("=" * 60)
+    print("Ingesting Data")
+    print("=" * 60)
+    if args.init:
+        state = initialize(args.data, args.clean, args.sketch_k)
+        print(f"✅ State built from {state.rows:,} rows ({state.distinct:,} distinct), {args.clean} rewritten")
+    if args.input:
+        summary = ingest(args.input, args.data, args.clean, args.sketch_k)
+        print(f"✅ Read {summary['rows']:,} new rows from {args.input}")
+        print(f"✅ Skipped {summary['duplicates']:,} duplicates, appended {summary['appended']:,} rows to {args.clean}")
+        print(f"✅ History: {summary['total_rows']:,} rows, {summary['total_distinct']:,} distinct "
+              f"({summary['seconds']:.2f}s)")
+        for name in summary['stats']['lower']:
+            print(f"   clip {name:<14} [{summary['stats']['lower'][name]:.4f}, {summary['stats']['upper'][name]:.4f}]")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+from bisect import bisect_left
+import glob
+import mmap
+import os
+import threading
+
+import numpy as np
+
+from procinfo import rss_bytes
+
+# Prometheus text-format metrics for /metrics. Every metric lives at a fixed
+# offset in one flat array of doubles per process, so recording a request is
+# a bisect plus a few in-place adds under one uncontended lock.
+#
+#   METRICS_DIR=path   multiprocess mode: each process writes its array to
+#                      path/metrics-<pid>.db (an mmap) and /metrics sums all
+#                      files. Files of exited workers are kept so counters
+#                      never go backwards; gunicorn.conf.py clears the
+#                      directory when the server starts.
+#
+# Without METRICS_DIR each process only reports its own requests.
+
+ROUTES = ['/', '/predict', '/predict/batch', '/predict/stream', '/health', '/health/live', '/health/ready', '/metrics',
+          '/models', '/admin/reload', 'other']
+STATUSES = ['200', '400', '404', '405', '413', '500', '503', 'other']
+LATENCY_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5]
+BATCH_ROWS_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 1000, 10000, 100000]
+PREFIX = 'gold_price'
+
+_ROUTE_INDEX = {route: i for i, route in enumerate(ROUTES)}
+_STATUS_INDEX = {int(status): i for i, status in enumerate(STATUSES[:-1])}
+_size = 0
+
+
+def _allocate(n):
+    global _size
+    offset = _size
+    _size += n
+    return offset
+
+
+class _Histogram:
+    # Slots per label value: one per bucket, +Inf, then the sum
+    def __init__(self, buckets, labels):
+        self.buckets = list(buckets)
+        self.labels = list(labels)
+        self.width = len(self.buckets) + 2
+        self.offset = _allocate(self.width * len(self.labels))
+
+    def base(self, label_index):
+        return self.offset + label_index * self.width
+
+
+_REQUESTS = _allocate(len(ROUTES) * len(STATUSES))
+_LATENCY = _Histogram(LATENCY_BUCKETS, ROUTES)
+_BATCH_ROWS = _Histogram(BATCH_ROWS_BUCKETS, ['request', 'microbatch'])
+_CACHE = _allocate(2)
+_AB_FALLBACK = _allocate(1)
+SIZE = _size
+
+# Precomputed offsets keep the recording functions to a few dict/list lookups
+_OTHER_ROUTE = len(ROUTES) - 1
+_OTHER_STATUS = len(STATUSES) - 1
+_REQUEST_BASES = [_REQUESTS + r * len(STATUSES) for r in range(len(ROUTES))]
+_LATENCY_BASES = [_LATENCY.base(r) for r in range(len(ROUTES))]
+_BATCH_BASES = [_BATCH_ROWS.base(i) for i in range(len(_BATCH_ROWS.labels))]
+_LATENCY_SUM = _LATENCY.width - 1
+_BATCH_SUM = _BATCH_ROWS.width - 1
+
+
+class _Store:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.directory = os.environ.get('METRICS_DIR')
+        self.path = None
+        self.values = None
+        self.open()
+
+    def open(self):
+        # Called again in forked children so each worker writes its own file
+        self.lock = threading.Lock()
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self.path = os.path.join(self.directory, f'metrics-{os.getpid()}.db')
+            with open(self.path, 'wb') as f:
+                f.truncate(SIZE * 8)
+            with open(self.path, 'r+b') as f:
+                self._buffer = mmap.mmap(f.fileno(), SIZE * 8)
+        else:
+            self._buffer = bytearray(SIZE * 8)
+        self.values = memoryview(self._buffer).cast('d')
+
+    def snapshot(self):
+        # Sum over every process that wrote to the directory (or just this one)
+        if not self.directory:
+            return np.frombuffer(self._buffer, dtype=np.float64).copy(), [os.getpid()]
+        total = np.zeros(SIZE)
+        pids = []
+        for path in glob.glob(os.path.join(self.directory, 'metrics-*.db')):
+            try:
+                values = np.fromfile(path, dtype=np.float64)
+            except OSError:
+                continue
+            if len(values) != SIZE:
+                continue
+            total += values
+            pids.append(int(os.path.basename(path)[8:-3]))
+        return total, sorted(pids)
+
+
+_store = _Store()
+os.register_at_fork(after_in_child=_store.open)
+
+
+def observe_request(route, status, seconds):
+    r = _ROUTE_INDEX.get(route, _OTHER_ROUTE)
+    base = _LATENCY_BASES[r]
+    values = _store.values
+    with _store.lock:
+        values[_REQUEST_BASES[r] + _STATUS_INDEX.get(status, _OTHER_STATUS)] += 1
+        values[base + bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        values[base + _LATENCY_SUM] += seconds
+
+
+def observe_batch(rows, source=0):
+    # source 0: rows in a /predict/batch request, 1: rows per micro-batch
+    base = _BATCH_BASES[source]
+    values = _store.values
+    with _store.lock:
+        values[base + bisect_left(BATCH_ROWS_BUCKETS, rows)] += 1
+        values[base + _BATCH_SUM] += rows
+
+
+def observe_cache(hit):
+    values = _store.values
+    with _store.lock:
+        values[_CACHE + (0 if hit else 1)] += 1
+
+
+def observe_ab_fallback():
+    values = _store.values
+    with _store.lock:
+        values[_AB_FALLBACK] += 1
+
+
+def _format(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _histogram_lines(lines, name, histogram, totals, label_name):
+    for i, label in enumerate(histogram.labels):
+        start = histogram.base(i)
+        counts = np.cumsum(totals[start:start + histogram.width - 1])
+        if not counts[-1]:
+            continue
+        for bound, count in zip(histogram.buckets + ['+Inf'], counts):
+            lines.append(f'{name}_bucket{{{label_name}="{label}",le="{bound}"}} {_format(count)}')
+        lines.append(f'{name}_sum{{{label_name}="{label}"}} {_format(totals[start + histogram.width - 1])}')
+        lines.append(f'{name}_count{{{label_name}="{label}"}} {_format(counts[-1])}')
+
+
+def render(state=None, cache=None):
+    # Text exposition format (version 0.0.4)
+    totals, pids = _store.snapshot()
+    lines = [
+        f'# HELP {PREFIX}_requests_total HTTP requests by route and status.',
+        f'# TYPE {PREFIX}_requests_total counter',
+    ]
+    for r, route in enumerate(ROUTES):
+        for s, status in enumerate(STATUSES):
+            count = totals[_REQUESTS + r * len(STATUSES) + s]
+            if count:
+                lines.append(f'{PREFIX}_requests_total{{route="{route}",status="{status}"}} {_format(count)}')
+
+    lines += [
+        f'# HELP {PREFIX}_request_duration_seconds Request latency by route.',
+        f'# TYPE {PREFIX}_request_duration_seconds histogram',
+    ]
+    _histogram_lines(lines, f'{PREFIX}_request_duration_seconds', _LATENCY, totals, 'route')
+    lines += [
+        f'# HELP {PREFIX}_batch_rows Rows per /predict/batch request and per micro-batch.',
+        f'# TYPE {PREFIX}_batch_rows histogram',
+    ]
+    _histogram_lines(lines, f'{PREFIX}_batch_rows', _BATCH_ROWS, totals, 'source')
+
+    lines += [
+        f'# HELP {PREFIX}_cache_requests_total Prediction cache lookups by result.',
+        f'# TYPE {PREFIX}_cache_requests_total counter',
+        f'{PREFIX}_cache_requests_total{{result="hit"}} {_format(totals[_CACHE])}',
+        f'{PREFIX}_cache_requests_total{{result="miss"}} {_format(totals[_CACHE + 1])}',
+        f'# HELP {PREFIX}_ab_fallback_total A/B requests served by the default model because the candidate failed to load.',
+        f'# TYPE {PREFIX}_ab_fallback_total counter',
+        f'{PREFIX}_ab_fallback_total {_format(totals[_AB_FALLBACK])}',
+    ]
+    if cache is not None:
+        stats = cache.stats()
+        lines += [
+            f'# HELP {PREFIX}_cache_entries Entries in the prediction cache ({stats["backend"]}).',
+            f'# TYPE {PREFIX}_cache_entries gauge',
+            f'{PREFIX}_cache_entries {stats["size"]}',
+            f'# HELP {PREFIX}_cache_max_entries Capacity of the prediction cache.',
+            f'# TYPE {PREFIX}_cache_max_entries gauge',
+            f'{PREFIX}_cache_max_entries {stats["max_size"]}',
+        ]
+
+    if state is not None:
+        lines += [
+            f'# HELP {PREFIX}_model_info Loaded model version and scorer kind.',
+            f'# TYPE {PREFIX}_model_info gauge',
+            f'{PREFIX}_model_info{{version="{state.version}",kind="{state.scorer.kind}"}} 1',
+            f'# HELP {PREFIX}_model_load_seconds Time spent loading the model.',
+            f'# TYPE {PREFIX}_model_load_seconds gauge',
+            f'{PREFIX}_model_load_seconds {state.load_seconds!r}',
+            f'# HELP {PREFIX}_model_warmup_seconds Time spent warming up the model.',
+            f'# TYPE {PREFIX}_model_warmup_seconds gauge',
+            f'{PREFIX}_model_warmup_seconds {getattr(state, "warmup_seconds", 0.0)!r}',
+        ]
+
+    # Resident memory of every live process that has recorded metrics
+    lines += [
+        f'# HELP {PREFIX}_process_resident_memory_bytes Resident memory per worker process.',
+        f'# TYPE {PREFIX}_process_resident_memory_bytes gauge',
+    ]
+    for pid in pids:
+        rss = rss_bytes(pid)
+        if rss is not None:
+            lines.append(f'{PREFIX}_process_resident_memory_bytes{{pid="{pid}"}} {rss}')
+    return '\n'.join(lines) + '\n'
+
+
+def clear_stale_files():
+    # Files from a previous run would otherwise be summed in; keeps this process's own
+    if not _store.directory:
+        return
+    for path in glob.glob(os.path.join(_store.directory, 'metrics-*.db')):
+        if path != _store.path:
+            os.remove(path)
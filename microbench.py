@@ -0,0 +1,137 @@
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from compiled import compile_scorer
+from inference import DEFAULTS, FEATURES, parse_batch, sample_inputs
+from loader import load_pickle
+
+# Times each stage of predict() on its own (JSON parsing, float conversion,
+# array construction, scaler.transform, model.predict) plus the compiled scorer
+# for several batch sizes and both model types, and compares against a stored
+# baseline.
+#
+#   python microbench.py --save-baseline microbench_baseline.json
+#   python microbench.py --baseline microbench_baseline.json --threshold 0.25
+
+BATCH_SIZES = [1, 10, 1000, 100000]
+
+
+def time_call(fn, min_seconds=0.2, max_repeats=1000):
+    # Median seconds per call; repeats until min_seconds of samples or max_repeats
+    fn()
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < 3 or (time.perf_counter() - started < min_seconds and len(samples) < max_repeats):
+        t = time.perf_counter_ns()
+        fn()
+        samples.append(time.perf_counter_ns() - t)
+    return float(np.median(samples)) / 1e9
+
+
+def load_models(model_path, scaler_path, data_path):
+    # The saved artifact plus a forest trained like notebook Step 8, so both
+    # model types are measured whichever one won
+    scaler = load_pickle(scaler_path)
+    model = load_pickle(model_path)
+    models = {type(model).__name__: model}
+
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.linear_model import LinearRegression
+    df = pd.read_csv(data_path)
+    X = scaler.transform(df[FEATURES].values)
+    for cls, kwargs in ((LinearRegression, {}), (RandomForestRegressor, {'n_estimators': 100, 'random_state': 42})):
+        if cls.__name__ not in models:
+            models[cls.__name__] = cls(**kwargs).fit(X, df['gold_price'])
+    return models, scaler
+
+
+def stage_timings(model, scaler, scorer, n):
+    X = sample_inputs(n, seed=n)
+    rows = [dict(zip(FEATURES, row)) for row in X.tolist()]
+    payload = json.dumps(rows[0] if n == 1 else rows)
+    data = json.loads(payload)
+    scaled = scaler.transform(X)
+
+    if n == 1:
+        # The single-row path of predict()
+        def extract():
+            return [float(data.get(name, DEFAULTS[name])) for name in FEATURES]
+        values = extract()
+
+        def build():
+            return np.array([values])
+    else:
+        # The /predict/batch path: parse_batch converts and builds in one step
+        def extract():
+            return parse_batch(data)
+        build = None
+
+    stages = {
+        'json_parse': lambda: json.loads(payload),
+        'extract': extract,
+        'array': build,
+        'scaler_transform': lambda: scaler.transform(X),
+        'model_predict': lambda: model.predict(scaled),
+        'compiled_predict': lambda: scorer.predict(X),
+    }
+    return {name: time_call(fn) for name, fn in stages.items() if fn is not None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmark the inference stages')
+    parser.add_argument('--model', default='gold_price_model.pkl')
+    parser.add_argument('--scaler', default='scaler.pkl')
+    parser.add_argument('--data', default='gold_price_clean.csv')
+    parser.add_argument('--sizes', default=','.join(map(str, BATCH_SIZES)))
+    parser.add_argument('--baseline', help='fail if any stage is slower than this baseline by more than --threshold')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown vs baseline (0.25 = 25%%)')
+    parser.add_argument('--save-baseline', help='write the results to this file')
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+
+    models, scaler = load_models(args.model, args.scaler, args.data)
+    sizes = [int(n) for n in args.sizes.split(',')]
+
+    results = {}
+    print("="*78)
+    print(f"{'Model':<24} {'Rows':>7}  {'Stage':<18} {'Per call':>12} {'Per row':>12}")
+    print("-"*78)
+    for name, model in models.items():
+        scorer = compile_scorer(model, scaler)
+        for n in sizes:
+            for stage, seconds in stage_timings(model, scaler, scorer, n).items():
+                results[f'{name}/{n}/{stage}'] = seconds
+                print(f"{name:<24} {n:>7}  {stage:<18} {seconds * 1e6:>10.1f}us {seconds * 1e9 / n:>10.1f}ns")
+        print("-"*78)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"✅ Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            print(f"❌ Baseline {args.baseline} not found")
+            sys.exit(2)
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = [
+            (key, baseline[key], seconds) for key, seconds in results.items()
+            if key in baseline and seconds > baseline[key] * (1 + args.threshold)
+        ]
+        for key, before, after in regressions:
+            print(f"❌ {key}: {before * 1e6:.1f}us -> {after * 1e6:.1f}us (+{after / before - 1:.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No stage slower than baseline by more than {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
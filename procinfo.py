@@ -0,0 +1,34 @@
+import os
+import resource
+import sys
+
+
+def memory_usage():
+    # On Linux, smaps_rollup splits RSS into shared and private pages, which
+    # shows whether copy-on-write sharing with the gunicorn master holds up
+    usage = {'pid': os.getpid()}
+    try:
+        fields = {}
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[0].endswith(':'):
+                    fields[parts[0][:-1]] = int(parts[1])
+        usage['rss_mb'] = round(fields['Rss'] / 1024, 1)
+        usage['pss_mb'] = round(fields['Pss'] / 1024, 1)
+        usage['shared_mb'] = round((fields['Shared_Clean'] + fields['Shared_Dirty']) / 1024, 1)
+        usage['private_mb'] = round((fields['Private_Clean'] + fields['Private_Dirty']) / 1024, 1)
+    except (OSError, KeyError):
+        # Elsewhere only the peak is available (KiB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        usage['max_rss_mb'] = round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    return usage
+
+
+def rss_bytes(pid):
+    # Resident set size of any process (Linux only; None elsewhere or once it exited)
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (OSError, IndexError, ValueError):
+        return None
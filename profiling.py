@@ -0,0 +1,152 @@
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+
+from batching import Histogram
+
+# Opt-in request instrumentation for the /predict endpoints:
+#   REQUEST_TIMING=1      per-stage timings in a Server-Timing header and
+#                         per-stage histograms on /health
+#   PROFILE_EVERY=N       profile one request in N (0 = off) ...
+#   PROFILE_DIR=path      ... and dump the profile there
+#   PROFILER=cprofile     or 'pyinstrument' when it is installed
+# PROFILING_CONTROL_FILE names a JSON file with the same keys in lower case
+# ({"request_timing": true, "profile_every": 100}); it is re-read when it
+# changes, so instrumentation can be toggled without a restart.
+
+STAGE_MS_BUCKETS = [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100]
+CONTROL_CHECK_SECONDS = 1.0
+
+
+class Settings:
+    def __init__(self):
+        self.request_timing = os.environ.get('REQUEST_TIMING', '0') == '1'
+        self.profile_every = int(os.environ.get('PROFILE_EVERY', 0))
+        self.profile_dir = os.environ.get('PROFILE_DIR', 'profiles')
+        self.profiler = os.environ.get('PROFILER', 'cprofile')
+        self.control_file = os.environ.get('PROFILING_CONTROL_FILE')
+        self._control_mtime = None
+        self._next_check = 0.0
+
+    def refresh(self):
+        # Cheap enough to call per request: stats the control file at most once a second
+        if not self.control_file or time.monotonic() < self._next_check:
+            return
+        self._next_check = time.monotonic() + CONTROL_CHECK_SECONDS
+        try:
+            mtime = os.stat(self.control_file).st_mtime_ns
+            if mtime == self._control_mtime:
+                return
+            with open(self.control_file) as f:
+                control = json.load(f)
+            self._control_mtime = mtime
+        except (OSError, ValueError):
+            return
+        self.request_timing = bool(control.get('request_timing', self.request_timing))
+        self.profile_every = int(control.get('profile_every', self.profile_every))
+        self.profile_dir = control.get('profile_dir', self.profile_dir)
+        self.profiler = control.get('profiler', self.profiler)
+
+    def to_dict(self):
+        return {
+            'request_timing': self.request_timing,
+            'profile_every': self.profile_every,
+            'profile_dir': self.profile_dir,
+            'profiler': self.profiler,
+        }
+
+
+settings = Settings()
+stage_histograms = {}
+_histogram_lock = threading.Lock()
+_current = contextvars.ContextVar('request_timings', default=None)
+_request_counter = itertools.count(1)
+
+
+class RequestTimings:
+    __slots__ = ('last', 'stages', 'token')
+
+    def __init__(self):
+        self.last = time.perf_counter_ns()
+        self.stages = []
+        self.token = None
+
+    def mark(self, stage):
+        # Charge the time since the previous mark to `stage`
+        now = time.perf_counter_ns()
+        self.stages.append((stage, now - self.last))
+        self.last = now
+
+    def header(self):
+        return ', '.join(f'{stage};dur={ns / 1e6:.3f}' for stage, ns in self.stages)
+
+
+def begin():
+    # Starts timing the current request; None when timing is off
+    if not settings.request_timing:
+        return None
+    timings = RequestTimings()
+    timings.token = _current.set(timings)
+    return timings
+
+
+def mark(stage):
+    timings = _current.get()
+    if timings is not None:
+        timings.mark(stage)
+
+
+def end(timings):
+    # Records the stages into the histograms and returns the Server-Timing value
+    _current.reset(timings.token)
+    with _histogram_lock:
+        for stage, ns in timings.stages:
+            histogram = stage_histograms.get(stage)
+            if histogram is None:
+                histogram = stage_histograms[stage] = Histogram(STAGE_MS_BUCKETS)
+            histogram.observe(ns / 1e6)
+    return timings.header()
+
+
+def start_profiler():
+    # Samples one request in PROFILE_EVERY; returns a running profiler or None
+    if settings.profile_every <= 0 or next(_request_counter) % settings.profile_every:
+        return None
+    if settings.profiler == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+        except ImportError:
+            pass
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another request on a different thread is already being profiled
+        return None
+    return profiler
+
+
+def stop_profiler(profiler, name):
+    os.makedirs(settings.profile_dir, exist_ok=True)
+    stem = os.path.join(settings.profile_dir, f"{name.strip('/').replace('/', '_')}-{os.getpid()}-{time.time_ns()}")
+    if hasattr(profiler, 'output_html'):
+        profiler.stop()
+        with open(stem + '.html', 'w') as f:
+            f.write(profiler.output_html())
+        return stem + '.html'
+    profiler.disable()
+    profiler.dump_stats(stem + '.prof')
+    return stem + '.prof'
+
+
+def stats():
+    with _histogram_lock:
+        stages = {stage: histogram.to_dict() for stage, histogram in stage_histograms.items()}
+    return {'settings': settings.to_dict(), 'stages': stages}
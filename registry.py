@@ -0,0 +1,195 @@
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from batching import Histogram
+from loader import load_state, validate_state, warm_up
+from procinfo import rss_bytes
+
+# Named models served next to the default one, selected per request with
+# {"model": "<name>"} (or ?model=<name>). MODEL_REGISTRY names a JSON file:
+#
+#   {"models": {
+#       "linear":    {"model": "gold_price_model.pkl", "scaler": "scaler.pkl"},
+#       "candidate": {"model": "gold_price_model_new.pkl", "scaler": "scaler_new.pkl", "lazy": true},
+#       "fused":     {"artifact": "gold_price_model"}
+#   }}
+#
+# Eager models load at startup (in the gunicorn master, so workers share them
+# copy-on-write); "lazy": true models load on first use in each worker and
+# are evicted least recently used first once the lazy models together exceed
+# MODEL_MEMORY_BUDGET_MB. Fused artifacts are memory-mapped, so their arrays
+# are shared through the page cache either way.
+
+DEFAULT_MODEL = 'default'
+LATENCY_MS_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100]
+
+
+def footprint_bytes(state):
+    # Size of the model's data: array bytes for fused artifacts, the pickled
+    # size for sklearn objects (close to their in-memory arrays)
+    if state.fused is not None:
+        return int(sum(array.nbytes for array in state.fused.to_arrays().values()))
+    return len(pickle.dumps((state.model, state.scaler), protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class ModelEntry:
+    def __init__(self, name, spec):
+        self.name = name
+        self.spec = spec
+        self.lazy = bool(spec.get('lazy', False))
+        self.state = None
+        self.footprint = 0
+        self.rss_delta = None
+        self.loads = 0
+        self.evictions = 0
+        self.requests = 0
+        self.last_used = None
+        self.latency_ms = Histogram(LATENCY_MS_BUCKETS)
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+
+    def load(self):
+        # Same loader, validation and warm-up as the default model
+        for key in ('artifact', 'model', 'scaler'):
+            if key in self.spec and not os.path.exists(self.spec[key]):
+                raise FileNotFoundError(f"model '{self.name}': {self.spec[key]} not found")
+        if 'artifact' not in self.spec and not ('model' in self.spec and 'scaler' in self.spec):
+            raise ValueError(f"model '{self.name}' needs an 'artifact' or a 'model' and 'scaler'")
+        before = rss_bytes(os.getpid())
+        state = load_state(
+            inference_mode=self.spec.get('inference_mode'),
+            fused_path=self.spec.get('artifact'),
+            model_path=self.spec.get('model', ''),
+            scaler_path=self.spec.get('scaler', ''),
+            fallback=False,
+            use_fused='artifact' in self.spec,
+        )
+        validate_state(state)
+        warm_up(state)
+        after = rss_bytes(os.getpid())
+        self.footprint = footprint_bytes(state)
+        self.rss_delta = after - before if before is not None and after is not None else None
+        self.loads += 1
+        self.state = state
+        return state
+
+    def observe(self, seconds):
+        with self.lock:
+            self.requests += 1
+            self.latency_ms.observe(seconds * 1000.0)
+
+    def stats(self, state=None):
+        state = state or self.state
+        return {
+            'loaded': state is not None,
+            'lazy': self.lazy,
+            'version': state.version if state else None,
+            'inference_mode': state.scorer.kind if state else None,
+            'source': state.source if state else None,
+            'footprint_mb': round(self.footprint / 2**20, 2) if state else None,
+            'rss_delta_mb': round(self.rss_delta / 2**20, 1) if state and self.rss_delta is not None else None,
+            'loads': self.loads,
+            'evictions': self.evictions,
+            'requests': self.requests,
+            'latency_ms': self.latency_ms.to_dict(),
+        }
+
+
+class ModelRegistry:
+    def __init__(self, specs, budget_bytes=None):
+        # The default model itself is owned by service.state; this entry only
+        # collects its request statistics
+        self.default = ModelEntry(DEFAULT_MODEL, {})
+        self.entries = OrderedDict((name, ModelEntry(name, spec)) for name, spec in specs.items()
+                                   if name != DEFAULT_MODEL)
+        self.budget_bytes = budget_bytes
+        self._lock = threading.Lock()
+        # Lazy models in least-recently-used order
+        self._lru = OrderedDict()
+        self._default_version = None
+
+    @classmethod
+    def from_env(cls):
+        path = os.environ.get('MODEL_REGISTRY')
+        specs = {}
+        if path:
+            with open(path) as f:
+                specs = json.load(f)['models']
+        budget_mb = float(os.environ.get('MODEL_MEMORY_BUDGET_MB', 0))
+        return cls(specs, budget_mb * 2**20 if budget_mb > 0 else None)
+
+    def names(self):
+        return [DEFAULT_MODEL] + list(self.entries)
+
+    def load_eager(self):
+        for entry in self.entries.values():
+            if not entry.lazy:
+                entry.load()
+                print(f"✅ Registry model '{entry.name}' loaded ({entry.state.scorer.kind}, "
+                      f"{entry.footprint / 2**20:.1f} MB)")
+
+    def get(self, name):
+        # (entry, loaded state) for a named model, (None, None) if unknown. The
+        # state is returned rather than read back, since an eviction may clear
+        # entry.state while the caller is still using it.
+        entry = self.entries.get(name)
+        if entry is None:
+            return None, None
+        entry.last_used = time.time()
+        current = entry.state
+        if current is None:
+            with entry.load_lock:
+                current = entry.state
+                if current is None:
+                    current = entry.load()
+                    print(f"✅ Registry model '{name}' loaded on demand ({entry.footprint / 2**20:.1f} MB)")
+        if entry.lazy:
+            with self._lock:
+                self._lru[name] = entry
+                self._lru.move_to_end(name)
+                self._evict(keep=name)
+        return entry, current
+
+    def _evict(self, keep):
+        if not self.budget_bytes:
+            return
+        total = sum(entry.footprint for entry in self._lru.values())
+        for name in list(self._lru):
+            if total <= self.budget_bytes:
+                break
+            if name == keep:
+                continue
+            entry = self._lru.pop(name)
+            total -= entry.footprint
+            # Requests holding entry.state finish on it; the memory goes with the last one
+            entry.state = None
+            entry.evictions += 1
+            print(f"♻️ Registry model '{name}' evicted (memory budget {self.budget_bytes / 2**20:g} MB)")
+
+    def reload(self):
+        # After a hot reload: reload eager models, drop lazy ones until next use
+        with self._lock:
+            for name in list(self._lru):
+                self._lru.pop(name).state = None
+        for entry in self.entries.values():
+            if not entry.lazy:
+                entry.load()
+
+    def stats(self, default_state=None):
+        with self._lock:
+            lazy_bytes = sum(entry.footprint for entry in self._lru.values())
+        # The default model's footprint is measured once per version
+        if default_state is not None and self._default_version != default_state.version:
+            self.default.footprint = footprint_bytes(default_state)
+            self._default_version = default_state.version
+        models = {DEFAULT_MODEL: self.default.stats(default_state)}
+        models.update((name, entry.stats()) for name, entry in self.entries.items())
+        return {
+            'budget_mb': round(self.budget_bytes / 2**20, 1) if self.budget_bytes else None,
+            'lazy_loaded_mb': round(lazy_bytes / 2**20, 2),
+            'models': models,
+        }
@@ -0,0 +1,75 @@
+import os
+import signal
+import threading
+import time
+
+from loader import file_version, watched_paths
+
+# Triggers for hot reload (see service.reload):
+#   MODEL_WATCH_SECONDS=N   poll the artifact files every N seconds
+#   SIGHUP                  to the gunicorn master, or to a standalone process
+#   POST /admin/reload      with ADMIN_TOKEN set
+
+
+def artifact_fingerprint():
+    return file_version(*watched_paths())
+
+
+class ArtifactWatcher:
+    # Calls on_change once the artifacts have changed and then stayed the same
+    # for one more poll, so a file that is still being copied is not loaded
+
+    def __init__(self, on_change, interval):
+        self.on_change = on_change
+        self.interval = interval
+        self.fingerprint = artifact_fingerprint()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='artifact-watcher', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def acknowledge(self, fingerprint):
+        # The artifacts with this fingerprint were loaded by another trigger
+        # (SIGHUP, /admin/reload promoting a pair): do not reload them again
+        with self._lock:
+            self.fingerprint = fingerprint
+
+    def _run(self):
+        pending = None
+        while True:
+            time.sleep(self.interval)
+            fingerprint = artifact_fingerprint()
+            with self._lock:
+                if fingerprint == self.fingerprint:
+                    pending = None
+                    continue
+                if fingerprint != pending:
+                    pending = fingerprint
+                    continue
+                self.fingerprint = fingerprint
+            print(f"🔄 Model artifacts changed ({', '.join(watched_paths())})")
+            pending = None
+            try:
+                self.on_change()
+            except Exception as e:
+                print(f"❌ Reload failed: {e}")
+
+
+def install_sighup(callback):
+    # Only the main thread may set handlers; gunicorn replaces this one in its
+    # master (which reloads through gunicorn.conf.py instead) and its workers
+    if not hasattr(signal, 'SIGHUP') or threading.current_thread() is not threading.main_thread():
+        return False
+
+    def handle(signum, frame):
+        # Never load inside a signal handler: hand off to a thread
+        threading.Thread(target=callback, name='sighup-reload', daemon=True).start()
+
+    signal.signal(signal.SIGHUP, handle)
+    return True
+
+
+def signal_master(pid):
+    os.kill(pid, signal.SIGHUP)
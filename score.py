@@ -0,0 +1,293 @@
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from inference import FEATURES
+from loader import MODEL_PATH, SCALER_PATH, load_state, validate_state
+
+# Offline bulk scoring: runs the saved model over a CSV or Parquet file and
+# writes the input rows back with `prediction` and `error` columns, in input
+# order.
+#
+#   python score.py gold_price_clean.csv --output scored.csv --workers 4
+#
+# The input is cut into chunks of about --chunk-rows rows: byte ranges ending
+# on a line break for CSV, row groups for Parquet. Each worker process reads,
+# parses and scores its own chunks, so nothing runs serially in the parent
+# apart from writing the results. The model is loaded once in the parent
+# before the pool starts; forked workers share it, spawned ones load it once
+# in their initializer.
+#
+# CSV rows are split on line breaks, so quoted fields must not contain them.
+
+PROGRESS_SECONDS = 1.0
+
+_settings = None
+_state = None
+
+
+def _load(settings):
+    return load_state(
+        inference_mode=settings['inference_mode'],
+        fused_path=settings['artifact'],
+        model_path=settings['model'],
+        scaler_path=settings['scaler'],
+        fallback=False,
+        use_fused=settings['artifact'] is not None,
+    )
+
+
+def _init_worker(settings, state):
+    global _settings, _state
+    _settings = settings
+    # One BLAS/OpenMP thread per process, or N workers fight over the cores
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
+    if state is None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            state = _load(settings)
+    _state = state
+
+
+def _file_format(path, given=None):
+    if given:
+        return given
+    return 'parquet' if path.endswith(('.parquet', '.pq')) else 'csv'
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("❌ Parquet needs pyarrow (pip install pyarrow)")
+        sys.exit(1)
+    return pq
+
+
+def _csv_header(path):
+    with open(path, 'rb') as f:
+        header = f.readline()
+    return header.rstrip(b'\r\n'), len(header)
+
+
+def _csv_chunks(path, start, chunk_rows):
+    # Byte ranges of roughly chunk_rows lines, each ending on a line break.
+    # The bytes per row are estimated from the first lines of the file.
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        sample = f.read(1024 * 1024)
+        lines = max(sample.count(b'\n'), 1)
+        chunk_bytes = max(int(len(sample) / lines * chunk_rows), 1)
+        chunks = []
+        offset = start
+        while offset < size:
+            f.seek(min(offset + chunk_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            chunks.append(('csv', offset, end - offset))
+            offset = end
+    return chunks, size
+
+
+def _quote(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _score(features):
+    # features: DataFrame of the FEATURES columns. Unparseable, empty and
+    # non-finite values invalidate their row only.
+    X = np.column_stack([
+        features[name].to_numpy(dtype=np.float64) if pd.api.types.is_numeric_dtype(features[name])
+        else pd.to_numeric(features[name], errors='coerce').to_numpy(dtype=np.float64)
+        for name in FEATURES
+    ])
+    finite = np.isfinite(X)
+    valid = finite.all(axis=1)
+    predictions = np.full(len(X), np.nan)
+    if valid.any():
+        predictions[valid] = _state.scorer.predict(X[valid])
+    errors = [None] * len(X)
+    for i in np.flatnonzero(~valid).tolist():
+        errors[i] = f"invalid or missing value for '{FEATURES[int(np.flatnonzero(~finite[i])[0])]}'"
+    return predictions, errors
+
+
+def _score_chunk(task):
+    # Returns (rows, invalid rows, output): CSV bytes or a DataFrame for Parquet
+    if task[0] == 'csv':
+        _, offset, length = task
+        with open(_settings['input'], 'rb') as f:
+            f.seek(offset)
+            lines = [line for line in f.read(length).splitlines() if line.strip()]
+        body = b'\n'.join([_settings['header']] + lines)
+        if _settings['output_format'] == 'csv':
+            # Fast path: parse only the feature columns and append the results
+            # to the raw input lines, which are written back untouched
+            features = pd.read_csv(io.BytesIO(body), usecols=FEATURES)
+            predictions, errors = _score(features)
+            out = [
+                line + (f',,{_quote(error)}\n' if error else f',{p!r},\n').encode()
+                for line, p, error in zip(lines, predictions.tolist(), errors)
+            ]
+            return len(lines), sum(e is not None for e in errors), b''.join(out)
+        # Pass-through columns stay strings, as typed in the output schema
+        frame = pd.read_csv(io.BytesIO(body), dtype=str)
+    else:
+        pq = _require_pyarrow()
+        frame = pq.ParquetFile(_settings['input']).read_row_group(task[1]).to_pandas()
+
+    predictions, errors = _score(frame[FEATURES])
+    frame['prediction'] = predictions
+    frame['error'] = pd.Series(errors, index=frame.index, dtype=object)
+    invalid = sum(e is not None for e in errors)
+    if _settings['output_format'] == 'csv':
+        return len(frame), invalid, frame.to_csv(header=False, index=False).encode()
+    return len(frame), invalid, frame
+
+
+def _parquet_schema(columns, parquet=None):
+    # The output schema, fixed before the first chunk: the Parquet input's own
+    # types, or strings for CSV columns, plus the results. Inferring it from
+    # the first chunk breaks on a column that only has values further down.
+    import pyarrow as pa
+    if parquet is not None:
+        fields = [field for field in parquet.schema_arrow if field.name in columns]
+    else:
+        fields = [pa.field(name, pa.string()) for name in columns]
+    return pa.schema(fields + [pa.field('prediction', pa.float64()), pa.field('error', pa.string())])
+
+
+class _ParquetOutput:
+    def __init__(self, path, schema):
+        self.path = path
+        self.schema = schema
+        self.writer = None
+
+    def write(self, frame):
+        import pyarrow as pa
+        pq = _require_pyarrow()
+        table = pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, self.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score a CSV or Parquet file with the saved model')
+    parser.add_argument('input')
+    parser.add_argument('--output', help='CSV or Parquet (by extension); defaults to <input>_scored.csv')
+    parser.add_argument('--input-format', choices=['csv', 'parquet'], help='defaults to the file extension')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--scaler', default=SCALER_PATH)
+    parser.add_argument('--artifact', help='fused predictor artifact (see export_model.py) instead of model + scaler')
+    parser.add_argument('--inference-mode', choices=['sklearn', 'compiled'], default='sklearn')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-rows', type=int, default=100000, help='rows per chunk (CSV; Parquet uses row groups)')
+    args = parser.parse_args()
+
+    input_format = _file_format(args.input, args.input_format)
+    output = args.output or os.path.splitext(args.input)[0] + '_scored.csv'
+    output_format = _file_format(output)
+
+    print("=" * 60)
+    print("Bulk Scoring")
+    print("=" * 60)
+
+    settings = {
+        'input': args.input,
+        'model': args.model,
+        'scaler': args.scaler,
+        'artifact': args.artifact,
+        'inference_mode': args.inference_mode,
+        'output_format': output_format,
+    }
+    try:
+        state = _load(settings)
+        validate_state(state)
+    except Exception as e:
+        print(f"❌ Could not load the model: {e}")
+        sys.exit(1)
+    print(f"✅ Model ready ({state.scorer.kind}, version {state.version})")
+
+    if input_format == 'csv':
+        header, header_bytes = _csv_header(args.input)
+        columns = header.decode('utf-8-sig').split(',')
+        chunks, total = _csv_chunks(args.input, header_bytes, args.chunk_rows)
+        settings['header'] = header
+        parquet = None
+    else:
+        parquet = _require_pyarrow().ParquetFile(args.input)
+        # Index columns written by pandas come back as the index, not as columns
+        columns = [name for name in parquet.schema_arrow.names if not name.startswith('__index_level_')]
+        chunks = [('parquet', i) for i in range(parquet.num_row_groups)]
+        total = len(chunks)
+    missing = [name for name in FEATURES if name not in columns]
+    if missing:
+        print(f"❌ {args.input} has no column(s) {missing}")
+        sys.exit(1)
+    workers = max(1, min(args.workers, len(chunks)))
+    print(f"✅ {args.input}: {len(chunks)} chunk(s), {workers} worker(s)")
+
+    if output_format == 'csv':
+        out = open(output, 'wb')
+        header_columns = columns if input_format == 'parquet' else [header.decode('utf-8-sig')]
+        out.write((','.join(header_columns + ['prediction', 'error']) + '\n').encode())
+    else:
+        out = _ParquetOutput(output, _parquet_schema(columns, parquet))
+
+    # Forked workers inherit the loaded model; spawned ones load their own
+    inherited = state if multiprocessing.get_start_method() == 'fork' else None
+    started = time.perf_counter()
+    last_report = started
+    rows = invalid = done = 0
+    pool = None
+    try:
+        if workers > 1:
+            pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(settings, inherited))
+            results = pool.imap(_score_chunk, chunks)
+        else:
+            _init_worker(settings, state)
+            results = map(_score_chunk, chunks)
+
+        # imap yields in submission order, so the output keeps the input order
+        for task, (n, bad, result) in zip(chunks, results):
+            out.write(result)
+            rows += n
+            invalid += bad
+            done += task[2] if task[0] == 'csv' else 1
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_SECONDS:
+                last_report = now
+                print(f"   {done / total:6.1%}  {rows:>12,} rows  {rows / (now - started):>12,.0f} rows/s",
+                      file=sys.stderr, flush=True)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        out.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Scored {rows:,} rows in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:,.0f} rows/s)")
+    if invalid:
+        print(f"⚠️ {invalid:,} rows had invalid or missing values (see the error column)")
+    print(f"✅ Wrote {output}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
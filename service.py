@@ -0,0 +1,501 @@
+import hmac
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+import metrics
+import profiling
+import startup
+from batching import MicroBatcher
+from cache import PredictionCache, SharedPredictionCache, quantize
+from experiments import ABSplit, ShadowScorer
+from streaming import StreamScorer, detect_format
+from inference import FEATURES, BatchTooLarge, parse_batch
+from loader import MODEL_PATH, SCALER_PATH, find_fused_path, load_state, validate_state, warm_up
+from procinfo import memory_usage
+from registry import DEFAULT_MODEL, ModelRegistry
+from reloader import ArtifactWatcher, artifact_fingerprint, install_sighup, signal_master
+
+# Inference core shared by the Flask app (app.py) and the ASGI app (asgi.py).
+# Handlers take parsed JSON and return (body, status), so both front ends
+# produce identical results.
+
+# Maximum number of rows accepted by /predict/batch
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 10000))
+
+# Rows scored across the feature ranges before a worker reports ready (0 = skip)
+WARMUP_ROWS = int(os.environ.get('WARMUP_ROWS', 256))
+
+# STARTUP_MODE=eager (default) loads and warms the model inside init();
+# 'background' returns at once and loads on a thread while /health reports
+# 'warming' and predictions get 503, so the server accepts connections early.
+STARTUP_MODE = os.environ.get('STARTUP_MODE', 'eager')
+# Set by gunicorn.conf.py. A preloading master forks its workers as soon as
+# init() returns, so it always loads eagerly: a background load would finish
+# in no worker, and each one would load (and watch) its own copy instead.
+PRELOAD = os.environ.get('GUNICORN_PRELOAD') == '1'
+
+# Set by init(). Under gunicorn's preload_app (see gunicorn.conf.py) this runs
+# once in the master and the workers inherit the warmed model via fork.
+state = None
+batcher = None
+cache = None
+registry = None
+shadow = None
+ab_split = None
+load_error = None
+_init_lock = threading.Lock()
+_loader_pid = None
+
+# Hot reload (see reload()). Under gunicorn the master does the reloading so
+# every worker gets the new model: gunicorn.conf.py sets gunicorn_master_pid
+# and every trigger turns into a SIGHUP to it.
+gunicorn_master_pid = None
+watcher = None
+reloads = {'count': 0, 'failed': 0, 'unchanged': 0, 'last': None}
+_reload_lock = threading.Lock()
+
+
+def init():
+    global _loader_pid
+    with _init_lock:
+        if state is not None:
+            return state
+        if STARTUP_MODE != 'background' or PRELOAD:
+            if STARTUP_MODE == 'background':
+                print("⚠️ STARTUP_MODE=background is ignored under gunicorn preload_app; loading in the master")
+                startup.log.begin('eager')
+            _configure()
+            return _load()
+        # Threads do not survive fork, so a worker forked mid-load starts its own
+        if _loader_pid != os.getpid():
+            if _loader_pid is None:
+                _configure()
+            _loader_pid = os.getpid()
+            startup.log.begin(STARTUP_MODE)
+            threading.Thread(target=_load_in_background, name='model-loader', daemon=True).start()
+        return None
+
+
+def _load_in_background():
+    global load_error
+    try:
+        _load()
+    except Exception as e:
+        load_error = str(e)
+        print(f"❌ Model failed to load: {e}")
+
+
+def _load():
+    global state
+    if startup.log.mode is None:
+        startup.log.begin(STARTUP_MODE)
+    print("="*60)
+    print("GOLD PRICE PREDICTOR - MACHINE LEARNING POWERED")
+    print("="*60)
+    loaded = load_state()
+    # state is only published after warm-up, so /health/ready stays false until then
+    warm_up(loaded, WARMUP_ROWS)
+    print(f"✅ Model ready (load {loaded.load_seconds * 1000:.0f} ms, warm-up {loaded.warmup_seconds * 1000:.0f} ms)")
+    startup.log.add(f'load model ({loaded.scorer.kind})', loaded.load_seconds)
+    for name, seconds in loaded.phases:
+        startup.log.add(name, seconds, depth=1)
+    startup.log.add('warm-up', loaded.warmup_seconds)
+    if registry.entries:
+        # Named models from MODEL_REGISTRY (eager ones now, lazy ones on first use)
+        registry_started = time.perf_counter()
+        registry.load_eager()
+        startup.log.add('registry models', time.perf_counter() - registry_started)
+    startup.log.ready()
+    startup.log.report()
+    print("="*60)
+
+    state = loaded
+    _start_watcher()
+    return state
+
+
+def _start_watcher():
+    global watcher
+    interval = float(os.environ.get('MODEL_WATCH_SECONDS', 0))
+    if interval > 0 and watcher is None:
+        watcher = ArtifactWatcher(request_reload, interval).start()
+
+
+def install_reload_signal():
+    # SIGHUP reloads a standalone process (flask run, uvicorn)
+    if gunicorn_master_pid is None:
+        install_sighup(lambda: reload(force=True))
+
+
+def reload(force=False):
+    # Loads, validates and warms the new artifacts on the calling thread
+    # (never a request's), then publishes them with one assignment. Requests
+    # that already read `state` finish on the old model; the prediction cache
+    # is keyed on the model version, so old entries are never served.
+    global state
+    if not _reload_lock.acquire(blocking=False):
+        return {'status': 'busy', 'error': 'A reload is already running'}, 409
+    previous = state
+    try:
+        started = time.perf_counter()
+        # Taken before loading: a file replaced during the load still counts as new
+        fingerprint = artifact_fingerprint()
+        try:
+            candidate = load_state(fallback=False)
+            validate_state(candidate)
+            warm_up(candidate, WARMUP_ROWS)
+        except Exception as e:
+            reloads['failed'] += 1
+            reloads['last'] = {'status': 'failed', 'error': str(e), 'timestamp': datetime.now().isoformat()}
+            print(f"❌ Reload failed, still serving {previous.version if previous else 'nothing'}: {e}")
+            return dict(reloads['last'], model_version=previous.version if previous else None), 422
+        if watcher is not None:
+            # Whatever triggered this reload, the watcher must not fire again
+            # for the same files (e.g. after /admin/reload promoted a pair)
+            watcher.acknowledge(fingerprint)
+
+        if previous is not None and candidate.version == previous.version and not force:
+            reloads['unchanged'] += 1
+            return {'status': 'unchanged', 'model_version': previous.version}, 200
+
+        state = candidate
+        reloads['count'] += 1
+        reloads['last'] = {
+            'status': 'reloaded',
+            'from_version': previous.version if previous else None,
+            'model_version': candidate.version,
+            'seconds': round(time.perf_counter() - started, 3),
+            'timestamp': datetime.now().isoformat(),
+        }
+        print(f"✅ Reloaded model {reloads['last']['from_version']} -> {candidate.version} "
+              f"in {reloads['last']['seconds'] * 1000:.0f} ms")
+        if registry is not None and registry.entries:
+            try:
+                registry.reload()
+            except Exception as e:
+                print(f"⚠️ Registry models not reloaded: {e}")
+        return reloads['last'], 200
+    finally:
+        _reload_lock.release()
+
+
+def promote(model_path, scaler_path):
+    # Moves a validated model/scaler pair (e.g. fix_model.py's *_new.pkl) into
+    # the live file names, so the reload picks it up and restarts keep it
+    fused_path = find_fused_path()
+    if fused_path:
+        raise ValueError(f'serving the fused artifact {fused_path}; re-export it with export_model.py instead')
+    candidate = load_state(model_path=model_path, scaler_path=scaler_path, fallback=False, use_fused=False)
+    validate_state(candidate)
+    os.replace(model_path, MODEL_PATH)
+    os.replace(scaler_path, SCALER_PATH)
+    print(f"✅ Promoted {model_path} + {scaler_path} to {MODEL_PATH} + {SCALER_PATH}")
+
+
+def request_reload(force=False, model_path=None, scaler_path=None):
+    if model_path or scaler_path:
+        if not (model_path and scaler_path):
+            return {'error': 'model_path and scaler_path must be given together'}, 400
+        try:
+            promote(model_path, scaler_path)
+        except Exception as e:
+            return {'status': 'failed', 'error': str(e)}, 422
+        force = True
+    if gunicorn_master_pid is not None:
+        # The master reloads, then replaces the workers one by one
+        signal_master(gunicorn_master_pid)
+        return {'status': 'requested', 'master_pid': gunicorn_master_pid}, 202
+    return reload(force=force)
+
+
+def admin_reload(token, data):
+    # POST /admin/reload; disabled unless ADMIN_TOKEN is set
+    expected = os.environ.get('ADMIN_TOKEN')
+    if not expected:
+        return {'error': 'Not found'}, 404
+    if not token or not hmac.compare_digest(token, expected):
+        return {'error': 'Unauthorized'}, 401
+    data = data or {}
+    # Only files next to the live artifacts may be promoted
+    for key in ('model_path', 'scaler_path'):
+        if data.get(key) and os.path.basename(data[key]) != data[key]:
+            return {'error': f'{key} must be a file name in the working directory'}, 400
+    return request_reload(force=bool(data.get('force', True)),
+                          model_path=data.get('model_path'), scaler_path=data.get('scaler_path'))
+
+
+def _configure():
+    global batcher, cache, registry, shadow, ab_split
+    registry = ModelRegistry.from_env()
+
+    # Opt-in shadow scoring and A/B split against a registry model (experiments.py)
+    shadow = ShadowScorer.from_env(registry.get)
+    ab_split = ABSplit.from_env()
+    for experiment in (shadow, ab_split):
+        if experiment is not None and experiment.name not in registry.entries:
+            raise ValueError(f"model '{experiment.name}' is not in MODEL_REGISTRY")
+
+    # Opt-in micro-batching: concurrent /predict calls arriving within
+    # MICROBATCH_WINDOW_MS (or until MICROBATCH_MAX_ROWS rows) share one model call
+    if float(os.environ.get('MICROBATCH_WINDOW_MS', 0)) > 0:
+        batcher = MicroBatcher(
+            _score_microbatch,
+            window_ms=float(os.environ['MICROBATCH_WINDOW_MS']),
+            max_rows=int(os.environ.get('MICROBATCH_MAX_ROWS', 64))
+        )
+
+    # Opt-in prediction cache keyed on inputs at UI precision:
+    # PREDICTION_CACHE_SIZE entries, per worker ('local' LRU) or one table
+    # shared by all gunicorn workers ('shared', created here before fork)
+    cache_size = int(os.environ.get('PREDICTION_CACHE_SIZE', 0))
+    if cache_size > 0:
+        if os.environ.get('PREDICTION_CACHE_BACKEND', 'local') == 'shared':
+            cache = SharedPredictionCache(cache_size)
+        else:
+            cache = PredictionCache(cache_size)
+
+
+def _score_microbatch(X):
+    metrics.observe_batch(len(X), source=1)
+    return state.scorer.predict(X)
+
+
+def _not_ready():
+    if load_error is None and STARTUP_MODE == 'background':
+        return {'error': 'Model is warming up, retry shortly'}, 503
+    return {'error': 'Model not loaded. Please check server logs.'}, 500
+
+
+def _select(name):
+    # (entry, state, error) for a model name; None selects the default model
+    if name is None or name == DEFAULT_MODEL:
+        return registry.default, state, None
+    try:
+        entry, current = registry.get(name)
+    except Exception as e:
+        return None, None, ({'error': f"Model '{name}' failed to load: {e}"}, 503)
+    if entry is None:
+        return None, None, ({'error': f"Unknown model '{name}'", 'models': registry.names()}, 404)
+    return entry, current, None
+
+
+def _select_ab():
+    # _select for a request that named no model: the A/B split may route it
+    # to the candidate. The client never asked for that model, so if it fails
+    # to load the request falls back to the default instead of failing.
+    entry, current, error = _select(ab_split.choose())
+    if error is not None:
+        metrics.observe_ab_fallback()
+        return _select(None)
+    return entry, current, error
+
+
+def predict_one(data, model=None):
+    if state is None:
+        return _not_ready()
+    if model is None and isinstance(data, dict):
+        model = data.get('model')
+    entry, current, error = _select_ab() if model is None and ab_split is not None else _select(model)
+    if error is not None:
+        return error
+    # The cache and the micro-batcher only serve the default model
+    is_default = entry is registry.default
+
+    try:
+        # Extract features
+        usd_index = float(data.get('usd_index', 95.5))
+        inflation = float(data.get('inflation', 3.2))
+        oil_price = float(data.get('oil_price', 78.3))
+        interest_rate = float(data.get('interest_rate', 2.75))
+
+        # Create input array
+        input_array = np.array([[usd_index, inflation, oil_price, interest_rate]])
+        # Same check as parse_batch: the compiled scorers would return NaN or
+        # inf, which is not valid JSON, where sklearn raises
+        finite = np.isfinite(input_array[0])
+        if not finite.all():
+            return {'error': f"non-finite value for '{FEATURES[int(np.flatnonzero(~finite)[0])]}'"}, 400
+        profiling.mark('validate')
+
+        # Repeated inputs (UI sliders, sample data) are served from the cache
+        use_cache = cache is not None and is_default
+        key = quantize(input_array[0]) if use_cache else None
+        prediction = cache.get(key, current.version) if use_cache else None
+        if use_cache:
+            metrics.observe_cache(prediction is not None)
+            profiling.mark('cache')
+
+        model_seconds = None
+        if prediction is None:
+            # Scale features and make prediction
+            started = time.perf_counter()
+            if batcher is not None and is_default:
+                prediction = float(batcher.predict(input_array)[0])
+            else:
+                prediction = float(current.scorer.predict(input_array)[0])
+            model_seconds = time.perf_counter() - started
+            entry.observe(model_seconds)
+            profiling.mark('model')
+            if use_cache:
+                cache.put(key, prediction, current.version)
+        if shadow is not None and is_default:
+            shadow.submit(input_array, [prediction], model_seconds)
+
+        if startup.log.first_prediction_seconds is None:
+            startup.log.first_prediction()
+        body = {
+            'prediction': prediction,
+            'features': data
+        }
+        if not is_default:
+            body['model'] = entry.name
+        return body, 200
+
+    except Exception as e:
+        return {'error': str(e)}, 400
+
+
+def predict_many(data, model=None):
+    if state is None:
+        return _not_ready()
+    entry, current, error = _select_ab() if model is None and ab_split is not None else _select(model)
+    if error is not None:
+        return error
+
+    try:
+        # Validate all rows in one pass; bad rows are reported, not fatal
+        X, errors = parse_batch(data, MAX_BATCH_SIZE)
+        metrics.observe_batch(len(X))
+        profiling.mark('validate')
+    except BatchTooLarge as e:
+        return {'error': str(e)}, 413
+    except Exception as e:
+        return {'error': str(e)}, 400
+
+    try:
+        valid = np.ones(len(X), dtype=bool)
+        valid[list(errors)] = False
+
+        # Score every valid row with a single scaler + model call
+        predictions = np.full(len(X), np.nan)
+        if valid.any():
+            started = time.perf_counter()
+            predictions[valid] = current.scorer.predict(X[valid])
+            model_seconds = time.perf_counter() - started
+            entry.observe(model_seconds)
+            if shadow is not None and entry is registry.default:
+                shadow.submit(X[valid], predictions[valid], model_seconds)
+        profiling.mark('model')
+
+        if startup.log.first_prediction_seconds is None:
+            startup.log.first_prediction()
+        body = {
+            'predictions': [p if ok else None for p, ok in zip(predictions.tolist(), valid.tolist())],
+            'errors': [{'index': i, 'error': errors[i]} for i in sorted(errors)],
+            'count': len(X),
+            'scored': int(valid.sum())
+        }
+        if entry is not registry.default:
+            body['model'] = entry.name
+        return body, 200
+
+    except Exception as e:
+        return {'error': str(e)}, 400
+
+
+def stream_scorer(content_type=None, model=None):
+    # (StreamScorer, None) for /predict/stream, or (None, (body, status)).
+    # The whole stream is scored by the model selected here, even across a reload.
+    if state is None:
+        return None, _not_ready()
+    entry, current, error = _select(model)
+    if error is not None:
+        return None, error
+
+    def predict(X):
+        started = time.perf_counter()
+        predictions = current.scorer.predict(X)
+        entry.observe(time.perf_counter() - started)
+        metrics.observe_batch(len(X))
+        return predictions
+
+    return StreamScorer(predict, detect_format(content_type)), None
+
+
+def models():
+    if registry is None:
+        return {'models': {}}
+    stats = registry.stats(state)
+    if shadow is not None:
+        stats['shadow'] = shadow.stats()
+    if ab_split is not None:
+        stats['ab_split'] = ab_split.stats()
+    return stats
+
+
+def metrics_text():
+    return metrics.render(state, cache)
+
+
+def liveness():
+    # The process is up and answering; says nothing about the model
+    return {'status': 'alive', 'pid': os.getpid(), 'timestamp': datetime.now().isoformat()}
+
+
+def readiness():
+    # Ready once the model is loaded and warmed; 503 sends the load balancer elsewhere
+    current = state
+    if current is None:
+        status = 'warming' if load_error is None and STARTUP_MODE == 'background' else 'error'
+        return {'ready': False, 'status': status, 'error': load_error}, 503
+    return {
+        'ready': True,
+        'status': 'ok',
+        'model_version': current.version,
+        'inference_mode': current.scorer.kind,
+        'warmup_rows': WARMUP_ROWS,
+        'warmup_ms': round(current.warmup_seconds * 1000, 1),
+        'load_ms': round(current.load_seconds * 1000, 1),
+    }, 200
+
+
+def health():
+    current = state
+    if current is not None:
+        overall = 'ok'
+    else:
+        overall = 'warming' if load_error is None and STARTUP_MODE == 'background' else 'error'
+    status = {
+        'status': overall,
+        'model_loaded': current is not None,
+        'scaler_loaded': current is not None and (current.scaler is not None or current.fused is not None),
+        'inference_mode': current.scorer.kind if current else None,
+        'model_version': current.version if current else None,
+        'memory': memory_usage(),
+        'startup': startup.log.to_dict(),
+        'timestamp': datetime.now().isoformat()
+    }
+    if load_error is not None:
+        status['error'] = load_error
+    if current is not None and current.scorer.kind == 'grid':
+        status['grid'] = current.scorer.stats()
+    if batcher is not None:
+        status['batching'] = batcher.stats()
+    if cache is not None:
+        status['cache'] = cache.stats()
+    if registry is not None and registry.entries:
+        status['models'] = {name: {'loaded': e['loaded'], 'version': e['version']}
+                            for name, e in registry.stats(current)['models'].items()}
+    if shadow is not None:
+        status['shadow'] = shadow.stats()
+    if ab_split is not None:
+        status['ab_split'] = ab_split.stats()
+    if reloads['last'] is not None:
+        status['reloads'] = reloads
+    if profiling.settings.request_timing or profiling.settings.profile_every:
+        status['profiling'] = profiling.stats()
+    return status
@@ -0,0 +1,69 @@
+import os
+import time
+
+# Startup-phase breakdown, printed in the layout of `python -X importtime`
+# (self and cumulative time per phase) and reported under `startup` on /health.
+
+
+def process_age():
+    # Seconds since this process started (Linux only), so interpreter start-up
+    # and module imports before service.init() are counted too
+    try:
+        with open('/proc/self/stat') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return max(uptime - start_ticks / os.sysconf('SC_CLK_TCK'), 0.0)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StartupLog:
+    def __init__(self):
+        self.phases = []
+        self.mode = None
+        self.ready_seconds = None
+        self.first_prediction_seconds = None
+        self._started = None
+
+    def begin(self, mode):
+        # Everything before this point counts as interpreter start + imports
+        self.mode = mode
+        self.phases = []
+        self._started = time.perf_counter()
+        age = process_age()
+        if age is not None:
+            self.phases.append(('interpreter + imports', age, 0))
+            self._started -= age
+
+    def add(self, name, seconds, depth=0):
+        self.phases.append((name, seconds, depth))
+
+    def elapsed(self):
+        return time.perf_counter() - self._started if self._started is not None else None
+
+    def ready(self):
+        self.ready_seconds = self.elapsed()
+
+    def first_prediction(self):
+        self.first_prediction_seconds = self.elapsed()
+
+    def report(self):
+        print("startup: self [ms] | cumulative [ms] | phase")
+        cumulative = 0.0
+        for name, seconds, depth in self.phases:
+            if depth == 0:
+                cumulative += seconds
+            print(f"startup: {seconds * 1000:>9.1f} | {cumulative * 1000:>15.1f} | {'  ' * depth}{name}")
+
+    def to_dict(self):
+        return {
+            'mode': self.mode,
+            'phases_ms': [[('  ' * depth) + name, round(seconds * 1000, 1)] for name, seconds, depth in self.phases],
+            'ready_ms': round(self.ready_seconds * 1000, 1) if self.ready_seconds is not None else None,
+            'first_prediction_ms': (round(self.first_prediction_seconds * 1000, 1)
+                                    if self.first_prediction_seconds is not None else None),
+        }
+
+
+log = StartupLog()
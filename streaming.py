@@ -0,0 +1,134 @@
+import csv
+import json
+import os
+
+import numpy as np
+
+from inference import FEATURES, parse_batch
+
+# Incremental bulk scoring for /predict/stream. The request body (NDJSON rows
+# or CSV with a header line, e.g. gold_price_clean.csv) is fed in as it
+# arrives; every STREAM_CHUNK_ROWS complete lines are parsed and scored with
+# one model call and their results are emitted straight away, so memory
+# depends on the chunk size, not on the size of the upload.
+#
+# Output follows the input format: NDJSON lines {"index": i, "prediction": p}
+# (or {"index": i, "error": ...}), or CSV with index,prediction,error.
+
+CHUNK_ROWS = int(os.environ.get('STREAM_CHUNK_ROWS', 10000))
+MAX_LINE_BYTES = 1024 * 1024
+
+CONTENT_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def _csv_field(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def detect_format(content_type):
+    # None when the body has to be sniffed (see StreamScorer.feed)
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if content_type in ('text/csv', 'application/csv'):
+        return 'csv'
+    if content_type in ('application/x-ndjson', 'application/ndjson', 'application/jsonl', 'application/json-lines'):
+        return 'ndjson'
+    return None
+
+
+class StreamScorer:
+    def __init__(self, predict_fn, fmt=None, chunk_rows=CHUNK_ROWS):
+        self.predict_fn = predict_fn
+        self.format = fmt
+        self.chunk_rows = chunk_rows
+        self.header = None
+        self.rows = 0
+        self.scored = 0
+        self._pending = b''
+        self._lines = []
+
+    @property
+    def content_type(self):
+        return CONTENT_TYPES[self.format or 'ndjson']
+
+    def feed(self, data):
+        # Returns the output produced by this piece of the body (may be b'')
+        lines = (self._pending + data).split(b'\n')
+        self._pending = lines.pop()
+        if len(self._pending) > MAX_LINE_BYTES:
+            raise ValueError(f'line longer than {MAX_LINE_BYTES} bytes')
+        out = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if self.format is None:
+                self.format = 'ndjson' if line[:1] in (b'{', b'[') else 'csv'
+            if self.format == 'csv' and self.header is None:
+                self.header = next(csv.reader([line.decode('utf-8-sig')]))
+                if not set(FEATURES) & set(self.header):
+                    raise ValueError(f'CSV header has none of the columns {FEATURES}')
+                out.append(b'index,prediction,error\n')
+                continue
+            self._lines.append(line)
+            if len(self._lines) >= self.chunk_rows:
+                out.append(self._flush())
+        return b''.join(out)
+
+    def close(self):
+        # End of body: scores whatever is left
+        out = self.feed(b'\n') if self._pending.strip() else b''
+        if self._lines:
+            out += self._flush()
+        return out
+
+    def _flush(self):
+        lines, self._lines = self._lines, []
+        offset = self.rows
+        self.rows += len(lines)
+        if self.format == 'csv':
+            X, errors = self._parse_csv(lines)
+        else:
+            X, errors = self._parse_ndjson(lines)
+
+        valid = np.ones(len(X), dtype=bool)
+        valid[list(errors)] = False
+        predictions = np.full(len(X), np.nan)
+        if valid.any():
+            predictions[valid] = self.predict_fn(X[valid])
+        self.scored += int(valid.sum())
+        return self._render(offset, predictions.tolist(), errors)
+
+    def _parse_ndjson(self, lines):
+        rows, bad = [], {}
+        for i, line in enumerate(lines):
+            try:
+                rows.append(json.loads(line))
+            except ValueError as e:
+                rows.append({})
+                bad[i] = f'invalid JSON: {e}'
+        X, errors = parse_batch(rows)
+        errors.update(bad)
+        return X, errors
+
+    def _parse_csv(self, lines):
+        # Columns by header name; other columns (date, gold_price) are ignored
+        # (missing feature columns take the usual defaults)
+        records = list(csv.reader(line.decode('utf-8') for line in lines))
+        columns = {}
+        for name in FEATURES:
+            if name in self.header:
+                j = self.header.index(name)
+                columns[name] = [record[j] if j < len(record) else '' for record in records]
+        return parse_batch(columns)
+
+    def _render(self, offset, predictions, errors):
+        if self.format == 'csv':
+            return ''.join(
+                f'{offset + i},,{_csv_field(errors[i])}\n' if i in errors else f'{offset + i},{p!r},\n'
+                for i, p in enumerate(predictions)
+            ).encode()
+        return ''.join(
+            json.dumps({'index': offset + i, 'error': errors[i]}) + '\n' if i in errors
+            else f'{{"index": {offset + i}, "prediction": {p!r}}}\n'
+            for i, p in enumerate(predictions)
+        ).encode()
@@ -0,0 +1,87 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compiled  # noqa: E402
+from compiled import _fold_thresholds, compile_forest, compile_linear  # noqa: E402
+from inference import sample_inputs  # noqa: E402
+
+StandardScaler = pytest.importorskip('sklearn.preprocessing').StandardScaler
+ensemble = pytest.importorskip('sklearn.ensemble')
+linear_model = pytest.importorskip('sklearn.linear_model')
+tree = pytest.importorskip('sklearn.tree')
+
+
+def _fit(model, rows=2000):
+    X = sample_inputs(rows, seed=1)
+    y = X @ np.array([-3.0, 40.0, 2.5, -60.0]) + np.sin(X[:, 0]) * 50
+    scaler = StandardScaler().fit(X)
+    return model.fit(scaler.transform(X), y), scaler
+
+
+def _boundary_rows(model, scaler):
+    # For every split, rows whose feature sits on the folded threshold and on
+    # the float64 values just below and above it: the inputs where a rounding
+    # difference would send a row down the other branch
+    mean, scale = scaler.mean_, scaler.scale_
+    base = sample_inputs(1, seed=2)[0]
+    rows = []
+    for estimator in getattr(model, 'estimators_', [model]):
+        t = estimator.tree_
+        for node in np.flatnonzero(t.children_left >= 0):
+            f = t.feature[node]
+            folded = _fold_thresholds(t.threshold[node:node + 1], mean[f:f + 1], scale[f:f + 1])[0]
+            for x in (np.nextafter(folded, -np.inf), folded, np.nextafter(folded, np.inf)):
+                row = base.copy()
+                row[f] = x
+                rows.append(row)
+    return np.array(rows)
+
+
+def test_linear_matches_sklearn():
+    model, scaler = _fit(linear_model.LinearRegression())
+    X = sample_inputs(500, seed=3)
+    expected = model.predict(scaler.transform(X))
+    np.testing.assert_allclose(compile_linear(model, scaler).predict(X), expected, rtol=1e-12)
+
+
+def test_tree_splits_match_sklearn_exactly():
+    model, scaler = _fit(tree.DecisionTreeRegressor(max_depth=8, random_state=0))
+    X = np.vstack([_boundary_rows(model, scaler), sample_inputs(500, seed=3)])
+    expected = model.predict(scaler.transform(X))
+    assert np.array_equal(compile_forest(model, scaler).predict(X), expected)
+
+
+@pytest.mark.parametrize('broadcast_limit', [compiled.BROADCAST_LIMIT, 0])
+def test_forest_matches_sklearn(monkeypatch, broadcast_limit):
+    # Both traversals: all trees at once, and one tree at a time
+    monkeypatch.setattr(compiled, 'BROADCAST_LIMIT', broadcast_limit)
+    model, scaler = _fit(ensemble.RandomForestRegressor(n_estimators=10, max_depth=6, random_state=0))
+    X = np.vstack([_boundary_rows(model, scaler), sample_inputs(500, seed=3)])
+    # The leaves match exactly; only the averaging order may differ by an ulp
+    expected = model.predict(scaler.transform(X))
+    np.testing.assert_allclose(compile_forest(model, scaler).predict(X), expected, rtol=1e-12)
+
+
+def test_fold_thresholds_on_float32_boundaries():
+    # Thresholds on float32 values and on the midpoints between neighbours,
+    # as sklearn produces, with scalers that do not divide evenly
+    rng = np.random.default_rng(0)
+    grid = rng.normal(size=200).astype(np.float32)
+    threshold = np.concatenate([grid.astype(np.float64),
+                                (grid.astype(np.float64) + np.nextafter(grid, np.float32(np.inf))) / 2])
+    mean = rng.normal(50, 20, size=len(threshold))
+    scale = rng.uniform(0.1, 30, size=len(threshold))
+
+    folded = _fold_thresholds(threshold, mean, scale)
+
+    def goes_left(x):
+        return ((x - mean) / scale).astype(np.float32) <= threshold
+
+    # folded is the largest input sklearn sends left
+    assert goes_left(folded).all()
+    assert not goes_left(np.nextafter(folded, np.inf)).any()
@@ -0,0 +1,14 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference import parse_batch  # noqa: E402
+
+
+def test_nested_values_are_row_errors():
+    X, errors = parse_batch({'usd_index': [[1.0], [2.0]], 'inflation': [2.0, 2.5],
+                             'oil_price': [70.0, 71.0], 'interest_rate': [1.0, 1.5]})
+    assert X.shape == (2, 4)
+    assert sorted(errors) == [0, 1]
+    assert 'usd_index' in errors[0]
@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FEATURES = ['usd_index', 'inflation', 'oil_price', 'interest_rate']
+
+
+def _score(*args):
+    command = [sys.executable, os.path.join(ROOT, 'score.py'), *args,
+               '--model', os.path.join(ROOT, 'gold_price_model.pkl'),
+               '--scaler', os.path.join(ROOT, 'scaler.pkl'), '--workers', '1']
+    result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+
+
+def _frame(rows=250):
+    # risk_category is empty for the whole first chunk of 100 rows
+    df = pd.read_csv(os.path.join(ROOT, 'gold_price_clean.csv'), nrows=rows)
+    df['risk_category'] = [None] * 150 + ['High', 'Low'] * ((rows - 150) // 2)
+    return df
+
+
+def test_csv_to_parquet_with_null_leading_column(tmp_path):
+    source = tmp_path / 'input.csv'
+    output = tmp_path / 'scored.parquet'
+    _frame().to_csv(source, index=False)
+    _score(str(source), '--output', str(output), '--chunk-rows', '100')
+
+    scored = pq.read_table(output).to_pandas()
+    assert len(scored) == 250
+    assert scored['risk_category'].isna().sum() == 150
+    assert list(scored['risk_category'].iloc[150:152]) == ['High', 'Low']
+    assert scored['prediction'].notna().all()
+
+
+def test_parquet_to_parquet_keeps_input_types(tmp_path):
+    source = tmp_path / 'input.parquet'
+    output = tmp_path / 'scored.parquet'
+    _frame().to_parquet(source, index=False, row_group_size=100)
+    _score(str(source), '--output', str(output))
+
+    table = pq.read_table(output)
+    assert table.schema.field('usd_index').type == pq.read_schema(source).field('usd_index').type
+    scored = table.to_pandas()
+    assert scored['risk_category'].isna().sum() == 150
+    assert scored['prediction'].notna().all()
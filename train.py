@@ -0,0 +1,256 @@
+import argparse
+import itertools
+import json
+import os
+import pickle
+import shutil
+import time
+
+import numpy as np
+
+from inference import FEATURES
+
+# Training: the notebook's Steps 7-8 as a script. Every candidate and grid
+# point is fitted in parallel (joblib processes, --n-jobs), on one scaler
+# fitted once and shared by all of them, and the best one by R² on the test
+# split is written straight to the serving artifact (see artifact.py) with
+# its metrics. A running server with MODEL_WATCH_SECONDS picks it up.
+#
+#   python train.py
+#   python train.py --config train.json --n-jobs 8 --features features
+#
+# The candidates default to the notebook's two models. A config file names
+# scikit-learn regressors with fixed params and a grid:
+#
+#   {"candidates": {
+#       "linear": {"model": "LinearRegression"},
+#       "ridge":  {"model": "Ridge", "grid": {"alpha": [0.1, 1, 10]}},
+#       "forest": {"model": "RandomForestRegressor", "params": {"random_state": 42},
+#                  "grid": {"n_estimators": [50, 100, 200], "max_depth": [null, 8]}}
+#   }}
+#
+# Forest grids over n_estimators are grown with warm_start instead of refitted:
+# one task per other-parameter combination fits the smallest forest, scores
+# it, then adds trees up to each larger size. sklearn seeds the added trees so
+# the result equals a fresh fit of that size with the same random_state.
+
+TARGET = 'gold_price'
+TEST_SIZE = 0.2
+
+DEFAULT_CANDIDATES = {
+    'linear': {'model': 'LinearRegression'},
+    'forest': {'model': 'RandomForestRegressor', 'params': {'n_estimators': 100, 'random_state': 42}},
+}
+
+# Models that can grow with warm_start and take n_jobs
+WARM_START_MODELS = ('RandomForestRegressor', 'ExtraTreesRegressor')
+
+
+def _model_class(name):
+    from sklearn import ensemble, linear_model, tree
+    for module in (linear_model, ensemble, tree):
+        if hasattr(module, name):
+            return getattr(module, name)
+    raise ValueError(f'unknown model: {name}')
+
+
+def expand(candidates):
+    # One task per grid point; n_estimators grids of warm-startable forests
+    # stay together as the sizes of one task
+    tasks = []
+    for name, spec in candidates.items():
+        model = spec['model']
+        _model_class(model)
+        grid = dict(spec.get('grid', {}))
+        sizes = None
+        if model in WARM_START_MODELS and len(grid.get('n_estimators', [])) > 1:
+            sizes = sorted(grid.pop('n_estimators'))
+        keys = sorted(grid)
+        for values in itertools.product(*(grid[key] for key in keys)):
+            params = dict(spec.get('params', {}), **dict(zip(keys, values)))
+            tasks.append({'candidate': name, 'model': model, 'params': params, 'sizes': sizes})
+    return tasks
+
+
+def load_data(data=None, features=None, test_size=TEST_SIZE):
+    # X_train, X_test, y_train, y_test as float64 arrays. A feature store
+    # gives its chronological split; a CSV or Parquet dataset is split in
+    # file order, as the notebook does (train_test_split with shuffle=False).
+    if features:
+        from featurestore import FeatureStore
+        store = FeatureStore.open(features)
+        return [np.asarray(a, dtype=np.float64) for a in store.split(test_size)], store.version
+    from datastore import load_frame
+    df = load_frame(data, FEATURES + [TARGET]).dropna()
+    X = df[FEATURES].to_numpy(dtype=np.float64)
+    y = df[TARGET].to_numpy(dtype=np.float64)
+    cut = len(X) - int(np.ceil(len(X) * test_size))
+    return [X[:cut], X[cut:], y[:cut], y[cut:]], None
+
+
+def fit_scaler(X_train):
+    from sklearn.preprocessing import StandardScaler
+    return StandardScaler().fit(X_train)
+
+
+def _score(model, X_test, y_test):
+    from sklearn.metrics import mean_absolute_error, r2_score
+    predictions = model.predict(X_test)
+    return {'r2': float(r2_score(y_test, predictions)), 'mae': float(mean_absolute_error(y_test, predictions))}
+
+
+def run_task(task, X_train, X_test, y_train, y_test, model_jobs=1):
+    # Returns (results, best model of this task)
+    cls = _model_class(task['model'])
+    params = dict(task['params'])
+    if 'n_jobs' in cls().get_params():
+        params.setdefault('n_jobs', model_jobs)
+    results = []
+    best = None
+    best_r2 = None
+    if task['sizes']:
+        model = cls(**dict(params, warm_start=True, n_estimators=task['sizes'][0]))
+        started = time.perf_counter()
+        for size in task['sizes']:
+            model.set_params(n_estimators=size)
+            model.fit(X_train, y_train)
+            result = dict(_score(model, X_test, y_test), candidate=task['candidate'], model=task['model'],
+                          params=dict(task['params'], n_estimators=size),
+                          fit_seconds=round(time.perf_counter() - started, 3))
+            results.append(result)
+            if best_r2 is None or result['r2'] > best_r2:
+                best_r2 = result['r2']
+                # The forest keeps growing, so keep this size as it is now
+                best = pickle.loads(pickle.dumps(model))
+        best.set_params(warm_start=False)
+        return results, best
+
+    model = cls(**params)
+    started = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - started
+    result = dict(_score(model, X_test, y_test), candidate=task['candidate'], model=task['model'],
+                  params=task['params'], fit_seconds=round(fit_seconds, 3))
+    return [result], model
+
+
+def search(tasks, X_train, X_test, y_train, y_test, n_jobs=-1):
+    # Fits every task; returns (all results, winning result, winning model)
+    from joblib import Parallel, delayed, effective_n_jobs
+    workers = min(effective_n_jobs(n_jobs), len(tasks))
+    # One level of parallelism: across tasks, or inside the model when
+    # there is only one task to run
+    model_jobs = 1 if workers > 1 else n_jobs
+    outputs = Parallel(n_jobs=workers)(
+        delayed(run_task)(task, X_train, X_test, y_train, y_test, model_jobs) for task in tasks
+    )
+    results = [result for task_results, _ in outputs for result in task_results]
+    best_index = max(range(len(outputs)), key=lambda i: max(r['r2'] for r in outputs[i][0]))
+    task_results, model = outputs[best_index]
+    winner = max(task_results, key=lambda r: r['r2'])
+    return results, winner, model
+
+
+def _move_aside(path):
+    old = path.rstrip('/') + '.old'
+    if os.path.isdir(old):
+        shutil.rmtree(old)
+    elif os.path.exists(old):
+        os.remove(old)
+    os.replace(path, old)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train candidate models and export the best one')
+    parser.add_argument('--data', default='gold_price_clean.csv', help='cleaned CSV or Parquet dataset directory')
+    parser.add_argument('--features', help='feature store directory (see featurestore.py) instead of --data')
+    parser.add_argument('--config', help='JSON file with the candidates and grids')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='parallel fits (-1: all cores)')
+    parser.add_argument('--test-size', type=float, default=TEST_SIZE)
+    parser.add_argument('--cache-dir', help='cache the fitted scaler across runs (joblib.Memory)')
+    parser.add_argument('--output', default='gold_price_model', help='serving artifact directory')
+    parser.add_argument('--pickle', action='store_true', help='also write gold_price_model.pkl and scaler.pkl')
+    parser.add_argument('--report', help='write every candidate result as JSON to this file')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Training Models")
+    print("=" * 60)
+    started = time.perf_counter()
+
+    candidates = DEFAULT_CANDIDATES
+    if args.config:
+        with open(args.config) as f:
+            candidates = json.load(f)['candidates']
+    tasks = expand(candidates)
+
+    (X_train, X_test, y_train, y_test), features_version = load_data(args.data, args.features, args.test_size)
+    print(f"✅ Training samples: {len(X_train):,}, testing samples: {len(X_test):,}")
+
+    # Preprocessing is fitted once; every candidate gets the same scaled arrays
+    fit = fit_scaler
+    if args.cache_dir:
+        from joblib import Memory
+        fit = Memory(args.cache_dir, verbose=0).cache(fit_scaler)
+    scaler = fit(X_train)
+    X_train_scaled = scaler.transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+
+    print(f"✅ {len(tasks)} fit task(s) from {len(candidates)} candidate(s), n_jobs={args.n_jobs}")
+    results, winner, model = search(tasks, X_train_scaled, X_test_scaled, y_train, y_test, args.n_jobs)
+    search_seconds = time.perf_counter() - started
+
+    print(f"\n{'Candidate':<12} {'Params':<40} {'MAE ($)':>10} {'R²':>8} {'Fit (s)':>8}")
+    print("-" * 82)
+    for result in sorted(results, key=lambda r: -r['r2']):
+        params = json.dumps(result['params'], sort_keys=True)
+        print(f"{result['candidate']:<12} {params[:40]:<40} {result['mae']:>10.2f} {result['r2']:>8.4f} "
+              f"{result['fit_seconds']:>8.3f}")
+    print(f"\n✅ Best: {winner['candidate']} {json.dumps(winner['params'], sort_keys=True)} "
+          f"(R² {winner['r2']:.4f}, MAE ${winner['mae']:.2f})")
+
+    metrics = {
+        'r2': winner['r2'],
+        'mae': winner['mae'],
+        'candidate': winner['candidate'],
+        'model': winner['model'],
+        'params': winner['params'],
+        'fit_seconds': winner['fit_seconds'],
+        'search_seconds': round(search_seconds, 3),
+        'candidates_fitted': len(results),
+        'train_rows': len(X_train),
+        'test_rows': len(X_test),
+    }
+    source = {'data': args.features or args.data, 'features_version': features_version, 'trainer': 'train.py'}
+
+    from artifact import save_artifact
+    from compiled import compile_scorer
+    scorer = compile_scorer(model, scaler)
+    if scorer.kind == 'sklearn':
+        # Not expressible as an artifact; serve it from the pickles instead
+        print(f"⚠️ {winner['model']} cannot be exported as an artifact, writing the .pkl files")
+        args.pickle = True
+        # The server prefers an artifact over the pickles, so an older one
+        # would keep being served: move it aside
+        from loader import find_fused_path
+        for path in {p for p in (args.output, find_fused_path()) if p and os.path.exists(p)}:
+            _move_aside(path)
+            print(f"⚠️ Moved the previous artifact {path} to {path}.old")
+    else:
+        header = save_artifact(scorer, args.output, source=source, metrics=metrics)
+        print(f"✅ Saved {scorer.kind} predictor version {header['version']} to {args.output}/")
+    if args.pickle:
+        import joblib
+        joblib.dump(model, 'gold_price_model.pkl')
+        joblib.dump(scaler, 'scaler.pkl')
+        print("✅ Saved gold_price_model.pkl and scaler.pkl")
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'winner': metrics, 'results': results}, f, indent=2)
+        print(f"✅ Report saved to {args.report}")
+    print(f"✅ Done in {time.perf_counter() - started:.2f}s")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()